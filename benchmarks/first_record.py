@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-record benchmark for Founder OS output formats.
+Runs fetch_emails against the simulated Gmail service from gmail_fetch.py
+and reports when a consumer could first read a record, plus output size.
+
+A JSON array can only be parsed once it is closed, so its first record is
+readable when the fetch ends. NDJSON lines are flushed as they are written.
+
+Usage:
+    python3 benchmarks/first_record.py [--rtt-ms 80] [--count 200]
+"""
+
+import io
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools import gmail, output
+from benchmarks.gmail_fetch import SimulatedGmail
+
+
+class _TimedWriter:
+    """Wrap a writer and note when the first record becomes readable."""
+
+    def __init__(self, writer, fmt, started, marks):
+        self.writer = writer
+        self.fmt = fmt
+        self.started = started
+        self.marks = marks
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+    def write(self, record):
+        self.writer.write(record)
+        if self.fmt == 'ndjson' and 'first' not in self.marks:
+            self.marks['first'] = time.perf_counter() - self.started
+
+    def close(self):
+        self.writer.close()
+        self.marks.setdefault('first', time.perf_counter() - self.started)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run(fmt, count, batch_size, rtt, per_item):
+    """Fetch `count` messages; return (first record s, total s, bytes)."""
+    service = SimulatedGmail(count, rtt, per_item)
+    marks = {}
+
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch('tools.gmail.get_gmail', return_value=service), \
+         patch('tools.gmail.OUTPUT_DIR', Path(tmp)), \
+         redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+
+        def timed_writer(directory, output_file, fmt):
+            return _TimedWriter(output.open_writer(directory, output_file, fmt), fmt, started, marks)
+
+        with patch('tools.gmail.open_writer', side_effect=timed_writer):
+            gmail.fetch_emails(max_results=count, output_file='out', batch_size=batch_size,
+                               collect=False, use_cache=False, fmt=fmt)
+        total = time.perf_counter() - started
+        size = (Path(tmp) / 'out').stat().st_size
+
+    return marks['first'], total, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time-to-first-record benchmark')
+    parser.add_argument('--rtt-ms', type=float, default=80, help='Simulated round-trip time')
+    parser.add_argument('--item-ms', type=float, default=2, help='Simulated server time per batch item')
+    parser.add_argument('--count', type=int, default=200, help='Messages to fetch')
+    parser.add_argument('--batch-size', type=int, default=gmail.BATCH_SIZE)
+    args = parser.parse_args()
+
+    rtt, per_item = args.rtt_ms / 1000, args.item_ms / 1000
+    print(f"{'format':>8}  {'first record s':>14}  {'total s':>8}  {'bytes':>9}")
+    for fmt in output.FORMATS:
+        first, total, size = run(fmt, args.count, args.batch_size, rtt, per_item)
+        print(f"{fmt:>8}  {first:>14.2f}  {total:>8.2f}  {size:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Serial versus batched Gmail fetch benchmark for Founder OS.
+Runs fetch_emails against a simulated Gmail service with a fixed round-trip
+latency, so the numbers show how request count drives wall time.
+
+Usage:
+    python3 benchmarks/gmail_fetch.py [--rtt-ms 80] [--counts 10 50 200]
+"""
+
+import io
+import sys
+import time
+import base64
+import argparse
+import tempfile
+from pathlib import Path
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools import gmail
+
+
+class SimulatedGmail:
+    """
+    Minimal Gmail service double. Every execute() costs one round trip;
+    a batch costs one round trip plus a small per-item server time.
+    """
+
+    def __init__(self, count, rtt, per_item):
+        self.rtt = rtt
+        self.per_item = per_item
+        self.round_trips = 0
+        self.ids = [f"m{i:05d}" for i in range(count)]
+
+    # Resource chain: users().messages().get/list
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def list(self, userId, maxResults, q, **kwargs):
+        return _Call(self, {'messages': [{'id': i, 'threadId': i} for i in self.ids[:maxResults]]})
+
+    def get(self, userId, id, **kwargs):
+        body = base64.urlsafe_b64encode(f"Body of {id}".encode()).decode()
+        return _Call(self, {
+            'id': id, 'threadId': id, 'snippet': '', 'labelIds': ['INBOX'],
+            'payload': {
+                'headers': [{'name': 'Subject', 'value': f"Message {id}"}],
+                'mimeType': 'text/plain', 'body': {'data': body},
+            },
+        })
+
+    def new_batch_http_request(self, callback=None):
+        return _Batch(self, callback)
+
+    def wait(self, items=0):
+        self.round_trips += 1
+        time.sleep(self.rtt + items * self.per_item)
+
+
+class _Call:
+    def __init__(self, service, response):
+        self.service = service
+        self.response = response
+
+    def execute(self):
+        self.service.wait()
+        return self.response
+
+
+class _Batch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.calls = []
+
+    def add(self, call, request_id=None, callback=None):
+        self.calls.append((request_id, call))
+
+    def execute(self):
+        self.service.wait(len(self.calls))
+        for request_id, call in self.calls:
+            self.callback(request_id, call.response, None)
+
+
+def run(count, batch_size, rtt, per_item):
+    """Fetch `count` messages and return (seconds, round trips)."""
+    service = SimulatedGmail(count, rtt, per_item)
+    with tempfile.TemporaryDirectory() as tmp, \
+         patch('tools.gmail.get_gmail', return_value=service), \
+         patch('tools.gmail.OUTPUT_DIR', Path(tmp)), \
+         redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        gmail.fetch_emails(max_results=count, batch_size=batch_size, use_cache=False)
+        elapsed = time.perf_counter() - started
+    return elapsed, service.round_trips
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serial vs batched Gmail fetch benchmark')
+    parser.add_argument('--rtt-ms', type=float, default=80, help='Simulated round-trip time')
+    parser.add_argument('--item-ms', type=float, default=2, help='Simulated server time per batch item')
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 20, 50, 100, 200])
+    parser.add_argument('--batch-size', type=int, default=gmail.BATCH_SIZE)
+    args = parser.parse_args()
+
+    rtt, per_item = args.rtt_ms / 1000, args.item_ms / 1000
+    print(f"{'messages':>8}  {'serial s':>9} {'trips':>6}  {'batched s':>9} {'trips':>6}  {'speedup':>7}")
+    for count in args.counts:
+        serial, serial_trips = run(count, 1, rtt, per_item)
+        batched, batched_trips = run(count, args.batch_size, rtt, per_item)
+        print(f"{count:>8}  {serial:>9.2f} {serial_trips:>6}  {batched:>9.2f} {batched_trips:>6}  "
+              f"{serial / batched:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the Founder OS tool CLIs.
+Measures wall time and `-X importtime` totals for every subcommand's --help,
+which exercises imports and argument parsing without touching the network.
+
+Usage:
+    python3 benchmarks/startup.py [-r RUNS]
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+COMMANDS = {
+    'gmail': ['fetch', 'threads', 'get', 'sync', 'search-local', 'draft', 'archive', 'attachments', 'auth'],
+    'gcal': ['list', 'create', 'availability', 'delete', 'auth'],
+    'gdrive': ['list', 'search', 'read', 'download', 'info', 'auth'],
+}
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def measure(tool, subcommand, runs):
+    """
+    Time one CLI invocation.
+
+    Returns:
+        Tuple of (median wall ms, median import ms, slowest top-level imports).
+    """
+    script = PROJECT_ROOT / 'tools' / f'{tool}.py'
+    argv = [sys.executable, '-X', 'importtime', str(script), subcommand, '--help']
+    env = {**os.environ, 'FOUNDER_OS_NO_DAEMON': '1'}
+
+    walls, imports, slowest = [], [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = subprocess.run(argv, capture_output=True, text=True, env=env, cwd=PROJECT_ROOT)
+        walls.append((time.perf_counter() - started) * 1000)
+
+        top_level = []
+        for line in result.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if match and len(match.group(3)) == 1:
+                top_level.append((int(match.group(2)) / 1000, match.group(4)))
+        imports.append(sum(ms for ms, _ in top_level))
+        slowest = sorted(top_level, reverse=True)[:3]
+
+    return statistics.median(walls), statistics.median(imports), slowest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Startup benchmark for Founder OS tools')
+    parser.add_argument('-r', '--runs', type=int, default=5, help='Runs per command')
+    args = parser.parse_args()
+
+    print(f"{'command':<26} {'wall ms':>8} {'import ms':>10}  slowest imports")
+    for tool, subcommands in COMMANDS.items():
+        for subcommand in subcommands:
+            wall, imported, slowest = measure(tool, subcommand, args.runs)
+            top = ', '.join(f"{name} {ms:.0f}" for ms, name in slowest)
+            print(f"{tool + ' ' + subcommand:<26} {wall:>8.1f} {imported:>10.1f}  {top}")
+
+
+if __name__ == '__main__':
+    main()
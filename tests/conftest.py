@@ -20,8 +20,90 @@ def _load_fixture(name):
         return json.load(f)
 
 
+class FakeBatch:
+    """Stand-in for BatchHttpRequest that runs each queued request on execute()."""
+
+    def __init__(self, callback=None):
+        self._callback = callback
+        self.requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        request_id = request_id or str(len(self.requests))
+        self.requests.append((request_id, request, callback or self._callback))
+
+    def execute(self):
+        for request_id, request, callback in self.requests:
+            try:
+                response, exception = request.execute(), None
+            except Exception as e:
+                response, exception = None, e
+            callback(request_id, response, exception)
+
+
+def _attach_fake_batch(service):
+    """Make service.new_batch_http_request() return FakeBatch objects."""
+    batches = []
+
+    def _new_batch(callback=None):
+        batch = FakeBatch(callback)
+        batches.append(batch)
+        return batch
+
+    service.new_batch_http_request.side_effect = _new_batch
+    service.batches = batches
+    return service
+
+
 # ── Shared fixtures ───────────────────────────────────────────────────
 
+@pytest.fixture
+def fake_batch():
+    """Return a helper that adds batch request support to a mock service."""
+    return _attach_fake_batch
+
+@pytest.fixture(autouse=True)
+def reset_auth_caches():
+    """Clear cached credentials, services, the shared transport, and quota state between tests."""
+    from tools import auth, transport, quota
+    auth.clear_credentials_cache()
+    auth.clear_service_cache()
+    transport.reset_transport()
+    quota.reset()
+    yield
+    auth.clear_credentials_cache()
+    auth.clear_service_cache()
+    transport.reset_transport()
+    quota.reset()
+
+
+@pytest.fixture
+def tmp_token_path(tmp_path):
+    """Point token.json and its lock file at a temporary directory."""
+    creds_dir = tmp_path / '.credentials'
+    token_path = creds_dir / 'token.json'
+    with patch('tools.auth.CREDS_DIR', creds_dir), \
+         patch('tools.auth.TOKEN_PATH', token_path), \
+         patch('tools.auth.LOCK_PATH', creds_dir / 'token.lock'):
+        yield token_path
+
+
+@pytest.fixture(autouse=True)
+def tmp_discovery_dir(tmp_path):
+    """Keep the discovery cache inside the test's temporary directory."""
+    discovery_dir = tmp_path / 'discovery'
+    with patch('tools.discovery.DISCOVERY_DIR', discovery_dir):
+        yield discovery_dir
+
+
+@pytest.fixture(autouse=True)
+def tmp_mailstore(tmp_path):
+    """Keep the local message and attachment stores inside the test's temporary directory."""
+    store_path = tmp_path / 'mailstore.db'
+    with patch('tools.mailstore.STORE_PATH', store_path), \
+         patch('tools.gmail.ATTACHMENT_STORE', tmp_path / 'attachment-store'):
+        yield store_path
+
+
 @pytest.fixture
 def mock_credentials():
     """Patch tools.auth.get_credentials to return a MagicMock.
@@ -65,6 +147,7 @@ def mock_gmail_service(gmail_fixture_data):
       - users().drafts().create().execute()
       - users().messages().modify().execute()
       - users().messages().attachments().get().execute()
+      - new_batch_http_request() (see FakeBatch)
     """
     service = MagicMock()
     data = gmail_fixture_data
@@ -102,6 +185,8 @@ def mock_gmail_service(gmail_fixture_data):
 
     service.users().messages().attachments().get.side_effect = _get_attachment
 
+    _attach_fake_batch(service)
+
     with patch('tools.gmail.get_gmail', return_value=service):
         yield service
 
@@ -6,32 +6,45 @@ Verifies credential loading, refresh, re-authentication, and service building.
 import sys
 import pytest
 from pathlib import Path
+from datetime import timedelta
 from unittest.mock import MagicMock, patch, mock_open
 
 
+ALL = [
+    'https://www.googleapis.com/auth/gmail.readonly',
+    'https://www.googleapis.com/auth/gmail.compose',
+    'https://www.googleapis.com/auth/gmail.modify',
+    'https://www.googleapis.com/auth/calendar',
+    'https://www.googleapis.com/auth/calendar.events',
+    'https://www.googleapis.com/auth/drive.readonly',
+]
+
+
+def _make_creds(valid=True, expired=False, refresh_token='refresh-tok', expiry=None):
+    """Build a credentials mock with every scope granted."""
+    creds = MagicMock()
+    creds.valid = valid
+    creds.expired = expired
+    creds.refresh_token = refresh_token
+    creds.expiry = expiry
+    creds.scopes = list(ALL)
+    creds.to_json.return_value = '{"token": "saved"}'
+    return creds
+
+
 @pytest.mark.unit
 class TestGetCredentials:
     """Tests for the get_credentials function."""
 
-    @patch('tools.auth.TOKEN_PATH')
     @patch('tools.auth.Credentials')
-    def test_get_credentials_loads_existing_token(self, mock_creds_cls, mock_token_path):
+    def test_get_credentials_loads_existing_token(self, mock_creds_cls, tmp_token_path):
         """Valid, non-expired token file is loaded without triggering any flow."""
         from tools.auth import get_credentials
 
-        mock_token_path.exists.return_value = True
-
-        creds = MagicMock()
-        creds.valid = True
-        creds.expired = False
-        creds.scopes = [
-            'https://www.googleapis.com/auth/gmail.readonly',
-            'https://www.googleapis.com/auth/gmail.compose',
-            'https://www.googleapis.com/auth/gmail.modify',
-            'https://www.googleapis.com/auth/calendar',
-            'https://www.googleapis.com/auth/calendar.events',
-            'https://www.googleapis.com/auth/drive.readonly',
-        ]
+        tmp_token_path.parent.mkdir(parents=True)
+        tmp_token_path.write_text('{}')
+
+        creds = _make_creds()
         mock_creds_cls.from_authorized_user_file.return_value = creds
 
         result = get_credentials()
@@ -39,50 +52,35 @@ class TestGetCredentials:
         mock_creds_cls.from_authorized_user_file.assert_called_once()
         assert result is creds
 
-    @patch('tools.auth.CREDS_DIR')
-    @patch('tools.auth.TOKEN_PATH')
     @patch('tools.auth.Request')
     @patch('tools.auth.Credentials')
     def test_get_credentials_refreshes_expired_token(
-        self, mock_creds_cls, mock_request_cls, mock_token_path, mock_creds_dir
+        self, mock_creds_cls, mock_request_cls, tmp_token_path
     ):
         """Expired token with a refresh token should be refreshed, not re-authed."""
         from tools.auth import get_credentials
 
-        mock_token_path.exists.return_value = True
-
-        creds = MagicMock()
-        creds.valid = False
-        creds.expired = True
-        creds.refresh_token = 'refresh-tok'
-        creds.scopes = [
-            'https://www.googleapis.com/auth/gmail.readonly',
-            'https://www.googleapis.com/auth/gmail.compose',
-            'https://www.googleapis.com/auth/gmail.modify',
-            'https://www.googleapis.com/auth/calendar',
-            'https://www.googleapis.com/auth/calendar.events',
-            'https://www.googleapis.com/auth/drive.readonly',
-        ]
+        tmp_token_path.parent.mkdir(parents=True)
+        tmp_token_path.write_text('{}')
+
+        creds = _make_creds(valid=False, expired=True)
         mock_creds_cls.from_authorized_user_file.return_value = creds
 
         result = get_credentials()
 
         creds.refresh.assert_called_once()
         assert result is creds
+        assert tmp_token_path.read_text() == '{"token": "saved"}'
 
-    @patch('tools.auth.CREDS_DIR')
-    @patch('tools.auth.TOKEN_PATH')
     @patch('tools.auth.CLIENT_SECRET_PATH')
     @patch('tools.auth.InstalledAppFlow')
     @patch('tools.auth.Credentials')
     def test_get_credentials_triggers_flow_when_no_token(
-        self, mock_creds_cls, mock_flow_cls, mock_secret_path,
-        mock_token_path, mock_creds_dir
+        self, mock_creds_cls, mock_flow_cls, mock_secret_path, tmp_token_path
     ):
         """When no token file exists, the browser auth flow should run."""
         from tools.auth import get_credentials
 
-        mock_token_path.exists.return_value = False
         mock_secret_path.exists.return_value = True
 
         flow_instance = MagicMock()
@@ -96,20 +94,19 @@ class TestGetCredentials:
         mock_flow_cls.from_client_secrets_file.assert_called_once()
         flow_instance.run_local_server.assert_called_once_with(port=0)
         assert result is new_creds
+        assert tmp_token_path.read_text() == '{"token": "new"}'
 
-    @patch('tools.auth.CREDS_DIR')
-    @patch('tools.auth.TOKEN_PATH')
     @patch('tools.auth.CLIENT_SECRET_PATH')
     @patch('tools.auth.InstalledAppFlow')
     @patch('tools.auth.Credentials')
     def test_get_credentials_reauths_on_scope_mismatch(
-        self, mock_creds_cls, mock_flow_cls, mock_secret_path,
-        mock_token_path, mock_creds_dir
+        self, mock_creds_cls, mock_flow_cls, mock_secret_path, tmp_token_path
     ):
         """When existing token is missing required scopes, re-auth should trigger."""
         from tools.auth import get_credentials
 
-        mock_token_path.exists.return_value = True
+        tmp_token_path.parent.mkdir(parents=True)
+        tmp_token_path.write_text('{}')
         mock_secret_path.exists.return_value = True
 
         # Existing creds have a subset of scopes
@@ -129,16 +126,14 @@ class TestGetCredentials:
         mock_flow_cls.from_client_secrets_file.assert_called_once()
         assert result is new_creds
 
-    @patch('tools.auth.TOKEN_PATH')
     @patch('tools.auth.CLIENT_SECRET_PATH')
     @patch('tools.auth.Credentials')
     def test_get_credentials_exits_when_no_client_secret(
-        self, mock_creds_cls, mock_secret_path, mock_token_path
+        self, mock_creds_cls, mock_secret_path, tmp_token_path
     ):
         """Missing client_secret.json should cause sys.exit(1)."""
         from tools.auth import get_credentials
 
-        mock_token_path.exists.return_value = False
         mock_secret_path.exists.return_value = False
 
         with pytest.raises(SystemExit) as exc_info:
@@ -146,22 +141,162 @@ class TestGetCredentials:
 
         assert exc_info.value.code == 1
 
+    @patch('tools.auth.Credentials')
+    def test_get_credentials_cached_in_memory(self, mock_creds_cls, tmp_token_path):
+        """A second call should not read token.json again."""
+        from tools.auth import get_credentials
+
+        tmp_token_path.parent.mkdir(parents=True)
+        tmp_token_path.write_text('{}')
+        mock_creds_cls.from_authorized_user_file.return_value = _make_creds()
+
+        first = get_credentials()
+        second = get_credentials()
+
+        assert first is second
+        mock_creds_cls.from_authorized_user_file.assert_called_once()
+
+    @patch('tools.auth.Request')
+    @patch('tools.auth.Credentials')
+    def test_get_credentials_refreshes_before_expiry(
+        self, mock_creds_cls, mock_request_cls, tmp_token_path
+    ):
+        """A still-valid token inside the refresh margin should be refreshed early."""
+        from tools.auth import get_credentials, credential_stats, _utcnow
+
+        tmp_token_path.parent.mkdir(parents=True)
+        tmp_token_path.write_text('{}')
+
+        creds = _make_creds(expiry=_utcnow() + timedelta(seconds=30))
+        mock_creds_cls.from_authorized_user_file.return_value = creds
+        before = credential_stats()['refreshes']
+
+        get_credentials()
+
+        creds.refresh.assert_called_once()
+        assert credential_stats()['refreshes'] == before + 1
+
+    @patch('tools.auth.Request')
+    @patch('tools.auth.Credentials')
+    def test_get_credentials_skips_refresh_done_by_other_process(
+        self, mock_creds_cls, mock_request_cls, tmp_token_path
+    ):
+        """If token.json was refreshed while waiting for the lock, reuse it."""
+        from tools.auth import get_credentials
+
+        tmp_token_path.parent.mkdir(parents=True)
+        tmp_token_path.write_text('{}')
+
+        stale = _make_creds(valid=False, expired=True)
+        fresh = _make_creds()
+        mock_creds_cls.from_authorized_user_file.side_effect = [stale, fresh]
+
+        result = get_credentials()
+
+        assert result is fresh
+        stale.refresh.assert_not_called()
+
+    def test_token_file_lock_is_exclusive(self, tmp_token_path):
+        """A second process should block until the lock is released."""
+        fcntl = pytest.importorskip('fcntl')
+        from tools.auth import _token_file_lock, LOCK_PATH
+
+        with _token_file_lock():
+            with open(LOCK_PATH, 'a') as other:
+                with pytest.raises(BlockingIOError):
+                    fcntl.flock(other.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
 
 @pytest.mark.unit
 class TestGetService:
     """Tests for the get_service function."""
 
+    @patch('tools.auth.load_document', return_value=None)
     @patch('tools.auth.build')
     @patch('tools.auth.get_credentials')
-    def test_get_service_returns_api_service(self, mock_get_creds, mock_build):
-        """get_service should call build() with the correct API name and version."""
+    def test_get_service_returns_api_service(self, mock_get_creds, mock_build, mock_load):
+        """Without a cached document, get_service should fall back to build()."""
         from tools.auth import get_service
+        from tools.quota import request_builder
 
         mock_creds = MagicMock()
         mock_get_creds.return_value = mock_creds
         mock_build.return_value = MagicMock(name='service')
 
-        result = get_service('gmail', 'v1')
+        with patch('tools.auth.get_http') as mock_http:
+            result = get_service('gmail', 'v1')
 
-        mock_build.assert_called_once_with('gmail', 'v1', credentials=mock_creds)
+        mock_http.assert_called_once_with(mock_creds)
+        mock_build.assert_called_once_with('gmail', 'v1', http=mock_http.return_value,
+                                           requestBuilder=request_builder())
         assert result is mock_build.return_value
+
+    @patch('tools.auth.build_from_document')
+    @patch('tools.auth.build')
+    @patch('tools.auth.get_credentials')
+    def test_get_service_uses_cached_discovery(self, mock_get_creds, mock_build, mock_from_doc):
+        """A cached discovery document should be used instead of build()."""
+        from tools.auth import get_service
+        from tools.quota import request_builder
+
+        mock_creds = MagicMock(token='tok', scopes=['a'])
+        mock_get_creds.return_value = mock_creds
+
+        with patch('tools.auth.load_document', return_value='{"doc": 1}'), \
+             patch('tools.auth.get_http') as mock_http:
+            result = get_service('gmail', 'v1')
+
+        mock_build.assert_not_called()
+        mock_from_doc.assert_called_once_with('{"doc": 1}', http=mock_http.return_value,
+                                              requestBuilder=request_builder())
+        assert result is mock_from_doc.return_value
+
+    @patch('tools.auth.load_document', return_value=None)
+    @patch('tools.auth.build')
+    @patch('tools.auth.get_credentials')
+    def test_get_service_reuses_cached_service(self, mock_get_creds, mock_build, mock_load):
+        """A second call with unchanged credentials should not rebuild."""
+        from tools.auth import get_service, service_stats
+
+        mock_creds = MagicMock(token='tok', scopes=['a'])
+        mock_get_creds.return_value = mock_creds
+        before = service_stats()
+
+        first = get_service('gmail', 'v1')
+        second = get_service('gmail', 'v1')
+
+        assert first is second
+        mock_build.assert_called_once()
+        after = service_stats()
+        assert after['builds'] - before['builds'] == 1
+        assert after['hits'] - before['hits'] == 1
+
+    @patch('tools.auth.load_document', return_value=None)
+    @patch('tools.auth.build')
+    @patch('tools.auth.get_credentials')
+    def test_get_service_rebuilds_after_token_refresh(self, mock_get_creds, mock_build, mock_load):
+        """A changed access token should invalidate the cached service."""
+        from tools.auth import get_service
+
+        mock_get_creds.return_value = MagicMock(token='old', scopes=['a'])
+        get_service('gmail', 'v1')
+
+        mock_get_creds.return_value = MagicMock(token='new', scopes=['a'])
+        get_service('gmail', 'v1')
+
+        assert mock_build.call_count == 2
+
+    @patch('tools.auth.load_document', return_value=None)
+    @patch('tools.auth.build')
+    @patch('tools.auth.get_credentials')
+    def test_get_service_rebuilds_when_scopes_change(self, mock_get_creds, mock_build, mock_load):
+        """New scopes on the same token should invalidate the cached service."""
+        from tools.auth import get_service
+
+        mock_get_creds.return_value = MagicMock(token='tok', scopes=['a'])
+        get_service('drive', 'v3')
+
+        mock_get_creds.return_value = MagicMock(token='tok', scopes=['a', 'b'])
+        get_service('drive', 'v3')
+
+        assert mock_build.call_count == 2
@@ -122,3 +122,14 @@ class TestLoadConfig:
         assert loaded['preferred_meeting_duration'] == 15
         assert loaded['preferred_meeting_days'] == ['Tuesday', 'Thursday']
         assert loaded['preferred_meeting_times']['start'] == '08:00'
+
+    def test_quota_limits_merge_partial_overrides(self, tmp_config):
+        """Overriding one API's quota should keep the defaults for the others."""
+        from tools.config import get_quota_limits
+
+        tmp_config.write_text(json.dumps({'quota_per_minute': {'gmail': 6000}}))
+        limits = get_quota_limits()
+
+        assert limits['per_minute']['gmail'] == 6000
+        assert limits['per_minute']['drive'] == 12000
+        assert limits['headroom'] == 0.9
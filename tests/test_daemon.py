@@ -0,0 +1,95 @@
+"""
+Tests for tools/daemon.py.
+Runs a real daemon on a temporary Unix socket with a fake tool module.
+"""
+
+import sys
+import socket
+import tempfile
+import threading
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'), reason='Unix sockets required')
+
+
+def _fake_main(argv):
+    """Tool entry point that echoes its arguments and honours exit codes."""
+    print(f"echo {' '.join(argv)}")
+    print("warning", file=sys.stderr)
+    if argv and argv[0] == 'fail':
+        sys.exit(3)
+
+
+@pytest.fixture
+def daemon_socket():
+    """Short socket path (Unix sockets have a ~100 character limit)."""
+    with tempfile.TemporaryDirectory(dir='/tmp') as tmp:
+        path = Path(tmp) / 'd.sock'
+        with patch('tools.daemon.socket_path', return_value=path):
+            yield path
+
+
+@pytest.fixture
+def running_daemon(daemon_socket):
+    """Serve the fake tool from a background thread."""
+    from tools import daemon
+
+    tools = {'echo': SimpleNamespace(main=_fake_main)}
+    with patch('tools.daemon._load_tools', return_value=tools):
+        thread = threading.Thread(target=daemon.serve, kwargs={'idle_timeout': 10}, daemon=True)
+        thread.start()
+        for _ in range(100):
+            if daemon._ping():
+                break
+            thread.join(0.02)
+        yield daemon
+        daemon.stop()
+        thread.join(5)
+
+
+@pytest.mark.unit
+class TestForwardToDaemon:
+    """Tests for forward_to_daemon and the serving loop."""
+
+    def test_forward_returns_when_no_daemon(self, daemon_socket):
+        """Without a daemon the caller should carry on in-process."""
+        from tools.daemon import forward_to_daemon
+
+        assert forward_to_daemon('echo', ['list']) is None
+
+    def test_forward_respects_disable_env(self, running_daemon, monkeypatch):
+        """FOUNDER_OS_NO_DAEMON should force in-process execution."""
+        monkeypatch.setenv('FOUNDER_OS_NO_DAEMON', '1')
+
+        assert running_daemon.forward_to_daemon('echo', ['list']) is None
+
+    def test_forward_streams_output_and_exit_code(self, running_daemon, capsys):
+        """Output should be relayed and the daemon's exit code used."""
+        with pytest.raises(SystemExit) as exc_info:
+            running_daemon.forward_to_daemon('echo', ['list', '-n', '5'])
+
+        assert exc_info.value.code == 0
+        captured = capsys.readouterr()
+        assert 'echo list -n 5' in captured.out
+        assert 'warning' in captured.err
+        assert '[daemon] echo list' in captured.err
+
+    def test_forward_propagates_failure(self, running_daemon, capsys):
+        """A command that exits non-zero should exit the client the same way."""
+        with pytest.raises(SystemExit) as exc_info:
+            running_daemon.forward_to_daemon('echo', ['fail'])
+
+        assert exc_info.value.code == 3
+
+    def test_status_reports_command_latency(self, running_daemon, capsys):
+        """Status should list each command with its average latency."""
+        with pytest.raises(SystemExit):
+            running_daemon.forward_to_daemon('echo', ['list'])
+
+        info = running_daemon.status()
+
+        assert info['commands']['echo list']['count'] == 1
+        assert 'avg_ms' in info['commands']['echo list']
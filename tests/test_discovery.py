@@ -0,0 +1,90 @@
+"""
+Tests for tools/discovery.py.
+Verifies the offline discovery cache is seeded, compacted, and refreshed.
+"""
+
+import json
+import pytest
+from unittest.mock import patch
+
+
+BUNDLED = json.dumps({
+    'name': 'gmail',
+    'version': 'v1',
+    'revision': '20260101',
+    'description': 'A long description that is only used for docstrings.',
+    'resources': {
+        'users': {
+            'methods': {
+                'getProfile': {'id': 'gmail.users.getProfile', 'description': 'Docs'},
+            },
+        },
+    },
+})
+
+
+@pytest.mark.unit
+class TestLoadDocument:
+    """Tests for the load_document function."""
+
+    def test_load_document_seeds_cache_from_bundled_copy(self, tmp_discovery_dir):
+        """First use should copy the bundled document into the cache."""
+        from tools.discovery import load_document
+
+        with patch('tools.discovery._bundled_document', return_value=BUNDLED):
+            document = load_document('gmail', 'v1')
+
+        assert json.loads(document)['revision'] == '20260101'
+        assert (tmp_discovery_dir / 'gmail.v1.20260101.json').exists()
+        index = json.loads((tmp_discovery_dir / 'index.json').read_text())
+        assert index['gmail.v1']['source'] == 'bundled'
+
+    def test_load_document_strips_descriptions(self, tmp_discovery_dir):
+        """Cached documents should not carry documentation-only keys."""
+        from tools.discovery import load_document
+
+        with patch('tools.discovery._bundled_document', return_value=BUNDLED):
+            document = load_document('gmail', 'v1')
+
+        assert 'description' not in document
+        assert 'getProfile' in document
+
+    def test_load_document_reads_cache_without_library(self, tmp_discovery_dir):
+        """Once cached, the bundled copy should not be read again."""
+        from tools.discovery import load_document
+
+        with patch('tools.discovery._bundled_document', return_value=BUNDLED):
+            load_document('gmail', 'v1')
+
+        with patch('tools.discovery._bundled_document') as bundled:
+            document = load_document('gmail', 'v1')
+
+        bundled.assert_not_called()
+        assert json.loads(document)['name'] == 'gmail'
+
+    def test_load_document_returns_none_when_unavailable(self, tmp_discovery_dir):
+        """No cached or bundled document should return None."""
+        from tools.discovery import load_document
+
+        with patch('tools.discovery._bundled_document', return_value=None):
+            assert load_document('unknown', 'v9') is None
+
+
+@pytest.mark.unit
+class TestRefreshDocuments:
+    """Tests for the refresh_documents function."""
+
+    def test_refresh_remote_replaces_old_revision(self, tmp_discovery_dir):
+        """A newer remote revision should replace the cached file."""
+        from tools.discovery import load_document, refresh_documents
+
+        with patch('tools.discovery._bundled_document', return_value=BUNDLED):
+            load_document('gmail', 'v1')
+
+        newer = BUNDLED.replace('20260101', '20260301')
+        with patch('tools.discovery._remote_document', return_value=newer):
+            refreshed = refresh_documents(remote=True, apis=[('gmail', 'v1')])
+
+        assert refreshed == {'gmail.v1': '20260301'}
+        assert (tmp_discovery_dir / 'gmail.v1.20260301.json').exists()
+        assert not (tmp_discovery_dir / 'gmail.v1.20260101.json').exists()
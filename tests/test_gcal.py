@@ -40,6 +40,16 @@ class TestListEvents:
 
         assert result == []
 
+    def test_list_events_writes_ndjson(self, mock_calendar_service, tmp_path):
+        """--format ndjson should write one event per line."""
+        from tools.gcal import list_events
+
+        with patch('tools.gcal.OUTPUT_DIR', tmp_path):
+            events = list_events(days=7, output_file='events.ndjson', fmt='ndjson')
+
+        lines = (tmp_path / 'events.ndjson').read_text().splitlines()
+        assert [json.loads(line) for line in lines] == events
+
 
 @pytest.mark.unit
 class TestCreateEvent:
@@ -66,6 +66,18 @@ class TestSearchFiles:
         assert 'trashed = false' in query
 
 
+    def test_search_files_to_stdout(self, mock_drive_service, capsys):
+        """search -o - should print the results as JSON on stdout only."""
+        from tools.gdrive import main
+
+        main(['search', 'proposal', '-o', '-', '--format', 'compact'])
+
+        captured = capsys.readouterr()
+        files = json.loads(captured.out)
+        assert files and 'id' in files[0]
+        assert 'Searching Drive' in captured.err
+
+
 @pytest.mark.unit
 class TestReadFile:
     """Tests for the read_file function."""
@@ -46,7 +46,7 @@ class TestFetchEmails:
 
         assert result is None
 
-    def test_fetch_emails_truncates_long_body(self, tmp_path):
+    def test_fetch_emails_truncates_long_body(self, tmp_path, fake_batch):
         """Email bodies longer than 5000 characters should be truncated."""
         from tools.gmail import fetch_emails
 
@@ -78,6 +78,7 @@ class TestFetchEmails:
             },
         }
         service.users().messages().get.return_value = get_mock
+        fake_batch(service)
 
         with patch('tools.gmail.get_gmail', return_value=service), \
              patch('tools.gmail.OUTPUT_DIR', tmp_path):
@@ -99,6 +100,451 @@ class TestFetchEmails:
             saved = json.load(f)
         assert len(saved) == 3
 
+    def test_fetch_emails_batches_gets(self, mock_gmail_service, tmp_path):
+        """Message gets should be grouped into batches of batch_size."""
+        from tools.gmail import fetch_emails
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            emails = fetch_emails(max_results=3, batch_size=2)
+
+        assert [len(b.requests) for b in mock_gmail_service.batches] == [2, 1]
+        assert [e['id'] for e in emails] == ['msg001', 'msg002', 'msg003']
+
+    def test_fetch_emails_serial_mode(self, mock_gmail_service, tmp_path):
+        """batch_size=1 should fetch each message with its own request."""
+        from tools.gmail import fetch_emails
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            emails = fetch_emails(max_results=3, batch_size=1)
+
+        assert mock_gmail_service.batches == []
+        assert len(emails) == 3
+
+    def test_fetch_emails_skips_failed_items(self, mock_gmail_service, tmp_path):
+        """One failing message should not drop the rest of its batch."""
+        from tools.gmail import fetch_emails
+
+        original = mock_gmail_service.users().messages().get.side_effect
+
+        def _get_or_fail(**kwargs):
+            if kwargs['id'] == 'msg002':
+                failing = MagicMock()
+                failing.execute.side_effect = RuntimeError('404 not found')
+                return failing
+            return original(**kwargs)
+
+        mock_gmail_service.users().messages().get.side_effect = _get_or_fail
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            emails = fetch_emails(max_results=3)
+
+        assert [e['id'] for e in emails] == ['msg001', 'msg003']
+
+
+@pytest.mark.unit
+class TestMetadataMode:
+    """Tests for metadata-only fetches and on-demand full bodies."""
+
+    def test_fetch_emails_metadata_mode_requests_partial_response(self, mock_gmail_service, tmp_path):
+        """Metadata mode should ask for headers only, with a fields mask."""
+        from tools.gmail import fetch_emails
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            emails = fetch_emails(max_results=3, mode='metadata')
+
+        get_kwargs = mock_gmail_service.users().messages().get.call_args[1]
+        assert get_kwargs['format'] == 'metadata'
+        assert 'Subject' in get_kwargs['metadataHeaders']
+        assert 'payload/headers' in get_kwargs['fields']
+        assert emails[0]['subject'] == 'Project timeline update'
+        assert 'body' not in emails[0]
+        assert emails[0]['labels'] == ['INBOX', 'UNREAD']
+
+    def test_fetch_emails_rejects_unknown_mode(self, mock_gmail_service, tmp_path):
+        """An unknown mode should raise before any request is made."""
+        from tools.gmail import fetch_emails
+
+        with pytest.raises(ValueError):
+            fetch_emails(mode='raw')
+
+    def test_get_messages_fetches_bodies_by_id(self, mock_gmail_service, tmp_path):
+        """get_messages should return full emails, in the order requested."""
+        from tools.gmail import get_messages
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            emails = get_messages(['msg003', 'msg001'], output_file='selected.json')
+
+        assert [e['id'] for e in emails] == ['msg003', 'msg001']
+        assert emails[1]['body'].startswith('Hi, just checking in')
+        assert mock_gmail_service.users().messages().list.call_count == 0
+        assert (tmp_path / 'selected.json').exists()
+
+
+@pytest.mark.unit
+class TestOutputFormats:
+    """Tests for --format and writing records to stdout."""
+
+    def test_fetch_ndjson_to_stdout_keeps_progress_on_stderr(self, mock_gmail_service, capsys):
+        """fetch -o - --format ndjson should print one record per stdout line."""
+        from tools.gmail import main
+
+        main(['fetch', '-n', '3', '-o', '-', '--format', 'ndjson'])
+
+        captured = capsys.readouterr()
+        records = [json.loads(line) for line in captured.out.splitlines()]
+        assert [r['id'] for r in records] == ['msg001', 'msg002', 'msg003']
+        assert 'Fetching emails' in captured.err
+
+    def test_fetch_compact_file(self, mock_gmail_service, tmp_path):
+        """Compact output should hold the same records without indentation."""
+        from tools.gmail import fetch_emails
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            emails = fetch_emails(max_results=3, output_file='out.json', fmt='compact')
+
+        text = (tmp_path / 'out.json').read_text()
+        assert '\n' not in text
+        assert json.loads(text) == emails
+
+
+@pytest.mark.unit
+class TestIterMessages:
+    """Tests for the iter_messages generator."""
+
+    def _paged_service(self, fake_batch, pages):
+        """Service whose list() returns the given pages of IDs in turn."""
+        service = MagicMock()
+        responses = []
+        for index, ids in enumerate(pages):
+            response = {'messages': [{'id': i, 'threadId': i} for i in ids]}
+            if index < len(pages) - 1:
+                response['nextPageToken'] = f"page{index + 1}"
+            responses.append(response)
+        service.users().messages().list.return_value.execute.side_effect = responses
+        service.users().messages().get.side_effect = lambda **kw: MagicMock(
+            execute=MagicMock(return_value={'id': kw['id']})
+        )
+        return fake_batch(service)
+
+    def test_iter_messages_follows_page_tokens(self, fake_batch):
+        """All pages should be read until nextPageToken runs out."""
+        from tools.gmail import iter_messages
+
+        service = self._paged_service(fake_batch, [['a', 'b'], ['c', 'd'], ['e']])
+
+        with patch('tools.gmail.get_gmail', return_value=service):
+            ids = [m['id'] for m in iter_messages('in:inbox', limit=None)]
+
+        assert ids == ['a', 'b', 'c', 'd', 'e']
+        list_calls = service.users().messages().list.call_args_list
+        assert 'pageToken' not in list_calls[0][1]
+        assert list_calls[1][1]['pageToken'] == 'page1'
+        assert list_calls[2][1]['pageToken'] == 'page2'
+
+    def test_iter_messages_stops_at_limit(self, fake_batch):
+        """No more pages should be requested once the limit is reached."""
+        from tools.gmail import iter_messages
+
+        service = self._paged_service(fake_batch, [['a', 'b'], ['c', 'd'], ['e']])
+
+        with patch('tools.gmail.get_gmail', return_value=service):
+            ids = [m['id'] for m in iter_messages('in:inbox', limit=3)]
+
+        assert ids == ['a', 'b', 'c']
+        list_calls = service.users().messages().list.call_args_list
+        assert list_calls[-1][1]['maxResults'] == 1
+
+    def test_iter_messages_is_lazy(self, fake_batch):
+        """Reading the first message should not list later pages."""
+        from tools.gmail import iter_messages
+
+        service = self._paged_service(fake_batch, [['a', 'b'], ['c', 'd']])
+        list_mock = service.users().messages().list
+        list_mock.reset_mock()
+
+        with patch('tools.gmail.get_gmail', return_value=service):
+            first = next(iter_messages('in:inbox', limit=None))
+
+        assert first['id'] == 'a'
+        assert list_mock.call_count == 1
+
+    def test_fetch_emails_without_collect_returns_count(self, mock_gmail_service, tmp_path):
+        """collect=False should stream to the file and return only the count."""
+        from tools.gmail import fetch_emails
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            result = fetch_emails(max_results=3, output_file='out.json', collect=False)
+
+        assert result == 3
+        saved = json.loads((tmp_path / 'out.json').read_text())
+        assert [e['id'] for e in saved] == ['msg001', 'msg002', 'msg003']
+
+
+@pytest.mark.unit
+class TestReadThroughStore:
+    """Tests for serving fetches, replies, and attachments from the local store."""
+
+    def test_second_fetch_reads_bodies_from_store(self, mock_gmail_service, tmp_path):
+        """Messages fetched once should not be downloaded again."""
+        from tools.gmail import fetch_emails
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            first = fetch_emails(max_results=3)
+            gets = mock_gmail_service.users().messages().get.call_count
+            second = fetch_emails(max_results=3)
+
+        assert mock_gmail_service.users().messages().get.call_count == gets
+        assert mock_gmail_service.users().messages().list.call_count == 2
+        assert second == first
+
+    def test_full_fetch_after_metadata_fetch_downloads_bodies(self, mock_gmail_service, tmp_path):
+        """Stored metadata should not satisfy a fetch that needs bodies."""
+        from tools.gmail import fetch_emails
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            fetch_emails(max_results=3, mode='metadata')
+            emails = fetch_emails(max_results=3)
+            triage = fetch_emails(max_results=3, mode='metadata')
+
+        assert mock_gmail_service.users().messages().get.call_count == 6
+        assert all('body' in e for e in emails)
+        assert not any('body' in e for e in triage)
+
+    def test_fetch_without_cache_always_downloads(self, mock_gmail_service, tmp_path):
+        """use_cache=False should bypass the store."""
+        from tools.gmail import fetch_emails
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            fetch_emails(max_results=3)
+            fetch_emails(max_results=3, use_cache=False)
+
+        assert mock_gmail_service.users().messages().get.call_count == 6
+
+    def test_reply_draft_uses_stored_thread_id(self, mock_gmail_service, tmp_path):
+        """A reply to a stored message should not look it up again."""
+        from tools.gmail import fetch_emails, create_draft
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            fetch_emails(max_results=3)
+        gets = mock_gmail_service.users().messages().get.call_count
+
+        create_draft('alice@example.com', 'Re: Project timeline update', 'Thanks', reply_to_id='msg001')
+
+        assert mock_gmail_service.users().messages().get.call_count == gets
+        body = mock_gmail_service.users().drafts().create.call_args[1]['body']
+        assert body['message']['threadId'] == 'thread001'
+
+    def test_attachments_use_stored_attachment_list(self, mock_gmail_service, tmp_path):
+        """A second attachment download should skip the message lookup."""
+        from tools.gmail import get_attachments
+
+        get_attachments('msg002', output_dir=str(tmp_path / 'first'))
+        gets = mock_gmail_service.users().messages().get.call_count
+        downloaded = get_attachments('msg002', output_dir=str(tmp_path / 'second'))
+
+        assert mock_gmail_service.users().messages().get.call_count == gets
+        assert [p.name for p in downloaded] == ['invoice-1042.pdf']
+
+
+def _thread_message(msg_id, sender, to, body, internal_date, cc=None):
+    """Build a full-format message resource for a thread."""
+    headers = [
+        {'name': 'From', 'value': sender},
+        {'name': 'To', 'value': to},
+        {'name': 'Subject', 'value': 'Contract'},
+        {'name': 'Date', 'value': f"date-{msg_id}"},
+    ]
+    if cc:
+        headers.append({'name': 'Cc', 'value': cc})
+    return {
+        'id': msg_id,
+        'threadId': 't1',
+        'labelIds': ['INBOX'],
+        'snippet': body[:20],
+        'internalDate': str(internal_date),
+        'payload': {
+            'mimeType': 'text/plain',
+            'headers': headers,
+            'body': {'data': base64.urlsafe_b64encode(body.encode()).decode()},
+        },
+    }
+
+
+@pytest.mark.unit
+class TestFetchThreads:
+    """Tests for fetch_threads() and the threads command."""
+
+    @pytest.fixture
+    def thread_service(self, fake_batch):
+        service = MagicMock()
+        thread = {'id': 't1', 'messages': [
+            _thread_message('m2', 'Me <me@example.com>', 'Sarah <sarah@acme.com>',
+                            'Signed copy attached.\n\nOn Mon, Sarah wrote:\n> Please sign', 2000),
+            _thread_message('m1', 'Sarah <sarah@acme.com>', 'me@example.com', 'Please sign', 1000,
+                            cc='Legal <legal@acme.com>'),
+        ]}
+        service.users().threads().list.return_value.execute.return_value = {'threads': [{'id': 't1'}]}
+        service.users().threads().get.return_value.execute.return_value = thread
+        fake_batch(service)
+        with patch('tools.gmail.get_gmail', return_value=service):
+            yield service
+
+    def test_fetch_threads_returns_one_compact_record(self, thread_service, tmp_path):
+        """Each thread should collapse to one record with participants and latest time."""
+        from tools.gmail import fetch_threads
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            threads = fetch_threads(max_results=5, query='contract')
+
+        assert len(threads) == 1
+        record = threads[0]
+        assert record['participants'] == ['legal@acme.com', 'me@example.com', 'sarah@acme.com']
+        assert record['message_count'] == 2
+        assert record['latest_from'] == 'Me <me@example.com>'
+        assert [m['id'] for m in record['messages']] == ['m1', 'm2']
+        assert record['messages'][1]['body'] == 'Signed copy attached.'
+        assert thread_service.users().threads().list.call_args[1]['q'] == 'contract'
+        assert len(thread_service.batches) == 1
+
+    def test_fetch_threads_metadata_mode_uses_partial_response(self, thread_service, tmp_path):
+        """Metadata mode should request headers only and omit bodies."""
+        from tools.gmail import fetch_threads
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            threads = fetch_threads(mode='metadata')
+
+        get_kwargs = thread_service.users().threads().get.call_args[1]
+        assert get_kwargs['format'] == 'metadata'
+        assert 'payload/headers' in get_kwargs['fields']
+        assert 'body' not in threads[0]['messages'][0]
+
+
+@pytest.mark.unit
+class TestSearchLocal:
+    """Tests for the search-local command."""
+
+    def test_search_local_finds_fetched_mail_without_api_calls(self, mock_gmail_service, tmp_path):
+        """Fetched emails should be searchable offline."""
+        from tools.gmail import fetch_emails, search_local
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            fetch_emails(max_results=3)
+        mock_gmail_service.reset_mock()
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            hits = search_local('invoice', output_file='hits.json')
+
+        assert [h['id'] for h in hits] == ['msg002']
+        assert not mock_gmail_service.method_calls
+        assert json.loads((tmp_path / 'hits.json').read_text())[0]['id'] == 'msg002'
+
+
+class _HistoryExpired(Exception):
+    """Mimics the HttpError Gmail raises for an expired startHistoryId."""
+
+    def __init__(self):
+        super().__init__('Requested entity was not found.')
+        self.resp = MagicMock(status=404)
+
+
+@pytest.mark.unit
+class TestSyncMailbox:
+    """Tests for sync_mailbox() and history-based incremental sync."""
+
+    @pytest.fixture
+    def gmail(self, mock_gmail_service):
+        mock_gmail_service.users().getProfile.return_value.execute.return_value = {'historyId': '100'}
+        return mock_gmail_service
+
+    def _history(self, gmail, *pages):
+        gmail.users().history().list.return_value.execute.side_effect = list(pages)
+        return gmail.users().history().list
+
+    def test_first_sync_lists_label_and_saves_history_id(self, gmail, tmp_path):
+        """The first run should do a full listing and record the historyId."""
+        from tools import mailstore
+        from tools.gmail import sync_mailbox
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            emails = sync_mailbox(output_file='sync.json')
+
+        assert len(emails) == 3
+        assert gmail.users().messages().list.call_args[1]['q'] == 'label:INBOX'
+        assert gmail.users().history().list.call_count == 0
+        conn = mailstore.connect()
+        assert mailstore.get_meta(conn, 'history_id') == '100'
+        assert json.loads((tmp_path / 'sync.json').read_text()) == emails
+
+    def test_unchanged_mailbox_costs_one_request(self, gmail, tmp_path):
+        """A second sync with no history should make a single history.list call."""
+        from tools.gmail import sync_mailbox
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            sync_mailbox()
+            gets = gmail.users().messages().get.call_count
+            history_list = self._history(gmail, {'historyId': '100'})
+            emails = sync_mailbox()
+
+        assert history_list.call_count == 1
+        assert history_list.call_args[1]['startHistoryId'] == '100'
+        assert gmail.users().messages().list.call_count == 1
+        assert gmail.users().messages().get.call_count == gets
+        assert len(emails) == 3
+
+    def test_history_deltas_are_applied(self, gmail, tmp_path, gmail_fixture_data):
+        """Added, deleted, and relabelled messages should update the store."""
+        from tools import mailstore
+        from tools.gmail import sync_mailbox
+
+        gmail_fixture_data['messages']['msg004'] = dict(
+            gmail_fixture_data['messages']['msg001'], id='msg004', threadId='thread004')
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            sync_mailbox()
+            self._history(gmail, {
+                'history': [
+                    {'id': '101', 'messagesAdded': [{'message': {'id': 'msg004', 'labelIds': ['INBOX']}}]},
+                    {'id': '102', 'messagesAdded': [{'message': {'id': 'sent1', 'labelIds': ['SENT']}}]},
+                    {'id': '103', 'messagesDeleted': [{'message': {'id': 'msg002'}}]},
+                    {'id': '104', 'labelsRemoved': [{'message': {'id': 'msg003'}, 'labelIds': ['INBOX']}]},
+                ],
+                'nextPageToken': 'p2',
+            }, {
+                'history': [{'id': '105', 'labelsRemoved': [{'message': {'id': 'msg001'}, 'labelIds': ['UNREAD']}]}],
+                'historyId': '105',
+            })
+            emails = sync_mailbox()
+
+        by_id = {e['id']: e for e in emails}
+        assert set(by_id) == {'msg001', 'msg004'}
+        assert 'UNREAD' not in by_id['msg001']['labels']
+        fetched = [c[1]['id'] for c in gmail.users().messages().get.call_args_list]
+        assert fetched.count('msg004') == 1
+        assert 'sent1' not in fetched
+        assert mailstore.get_meta(mailstore.connect(), 'history_id') == '105'
+
+    def test_expired_history_falls_back_to_full_sync(self, gmail, tmp_path):
+        """A 404 from history.list should trigger a full resync."""
+        from tools.gmail import sync_mailbox
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            sync_mailbox()
+            self._history(gmail, _HistoryExpired())
+            emails = sync_mailbox()
+
+        assert gmail.users().messages().list.call_count == 2
+        assert len(emails) == 3
+
+    def test_other_history_errors_propagate(self, gmail, tmp_path):
+        """Errors other than an expired history should not be swallowed."""
+        from tools.gmail import sync_mailbox
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            sync_mailbox()
+            self._history(gmail, RuntimeError('boom'))
+            with pytest.raises(RuntimeError):
+                sync_mailbox()
+
 
 @pytest.mark.unit
 class TestCreateDraft:
@@ -159,13 +605,65 @@ class TestArchiveEmails:
     """Tests for the archive_emails function."""
 
     def test_archive_emails_removes_labels(self, mock_gmail_service):
-        """Archiving should call modify with removeLabelIds for each message."""
+        """Archiving should remove INBOX and UNREAD with one batchModify call."""
         from tools.gmail import archive_emails
 
         ids = ['msg001', 'msg002']
-        archive_emails(ids)
+        result = archive_emails(ids)
 
-        assert mock_gmail_service.users().messages().modify.call_count == 2
+        batch_modify = mock_gmail_service.users().messages().batchModify
+        assert batch_modify.call_count == 1
+        assert batch_modify.call_args[1]['body'] == {'ids': ids, 'removeLabelIds': ['INBOX', 'UNREAD']}
+        assert mock_gmail_service.users().messages().modify.call_count == 0
+        assert result == {'archived': ids, 'failed': []}
+
+    def test_archive_emails_chunks_at_api_limit(self, mock_gmail_service):
+        """More IDs than one call accepts should be split into chunks."""
+        from tools.gmail import archive_emails
+
+        ids = [f"m{i}" for i in range(2500)]
+        with patch('tools.gmail.BATCH_MODIFY_LIMIT', 1000):
+            archive_emails(ids)
+
+        calls = mock_gmail_service.users().messages().batchModify.call_args_list
+        assert [len(c[1]['body']['ids']) for c in calls] == [1000, 1000, 500]
+
+    def test_archive_emails_retries_then_reports_failures(self, mock_gmail_service):
+        """A failing chunk should be retried once and then reported."""
+        from tools.gmail import archive_emails
+
+        batch_modify = mock_gmail_service.users().messages().batchModify
+        batch_modify.return_value.execute.side_effect = [
+            RuntimeError('backend error'), {},           # first chunk succeeds on retry
+            RuntimeError('down'), RuntimeError('down'),  # second chunk fails twice
+        ]
+        with patch('tools.gmail.BATCH_MODIFY_LIMIT', 2):
+            result = archive_emails(['a', 'b', 'c'])
+
+        assert result == {'archived': ['a', 'b'], 'failed': ['c']}
+        assert batch_modify.call_count == 4
+
+    def test_archive_by_query_lists_ids_without_fetching(self, mock_gmail_service):
+        """--query should archive listed IDs without downloading messages."""
+        from tools.gmail import archive_emails
+
+        result = archive_emails(query='from:billing@vendor.com')
+
+        assert mock_gmail_service.users().messages().list.call_args[1]['q'] == 'from:billing@vendor.com'
+        assert mock_gmail_service.users().messages().get.call_count == 0
+        assert result['archived'] == ['msg001', 'msg002', 'msg003']
+
+    def test_archive_updates_stored_labels(self, mock_gmail_service, tmp_path):
+        """Archived messages should leave the inbox in the local store too."""
+        from tools import mailstore
+        from tools.gmail import fetch_emails, archive_emails
+
+        with patch('tools.gmail.OUTPUT_DIR', tmp_path):
+            fetch_emails(max_results=3)
+        archive_emails(['msg001'])
+
+        inbox = mailstore.list_emails(mailstore.connect(), label='INBOX')
+        assert 'msg001' not in [e['id'] for e in inbox]
 
 
 @pytest.mark.unit
@@ -210,6 +708,82 @@ class TestGetAttachments:
         assert Path(downloaded[0]).name == 'report.pdf'
         assert Path(downloaded[0]).exists()
 
+    def _service_with_attachments(self, messages, attachments):
+        """Mock service serving the given message payloads and attachment data."""
+        service = MagicMock()
+
+        def _get_message(**kwargs):
+            result = MagicMock()
+            result.execute.return_value = messages[kwargs['id']]
+            return result
+
+        def _get_attachment(**kwargs):
+            result = MagicMock()
+            result.execute.return_value = {'data': base64.urlsafe_b64encode(attachments[kwargs['id']]).decode()}
+            return result
+
+        service.users().messages().get.side_effect = _get_message
+        service.users().messages().attachments().get.side_effect = _get_attachment
+        return service
+
+    def _message(self, msg_id, *parts):
+        return {
+            'id': msg_id,
+            'threadId': f"t-{msg_id}",
+            'payload': {'parts': [
+                {'filename': name, 'mimeType': 'image/png', 'body': {'attachmentId': att_id, 'size': size}}
+                for name, att_id, size in parts
+            ]},
+        }
+
+    def test_get_attachments_for_many_messages_dedupes_content(self, tmp_path):
+        """Identical files in different messages should share one stored copy."""
+        from tools.gmail import get_attachments
+
+        messages = {
+            'm1': self._message('m1', ('logo.png', 'a1', 10), ('notes.txt', 'a2', 10)),
+            'm2': self._message('m2', ('logo.png', 'a3', 10)),
+        }
+        data = {'a1': b'same logo', 'a2': b'notes', 'a3': b'same logo'}
+        service = self._service_with_attachments(messages, data)
+
+        with patch('tools.gmail.get_gmail', return_value=service):
+            downloaded = get_attachments(['m1', 'm2'], output_dir=str(tmp_path / 'out'))
+
+        assert sorted(str(p.relative_to(tmp_path / 'out')) for p in downloaded) == [
+            'm1/logo.png', 'm1/notes.txt', 'm2/logo.png']
+        assert (tmp_path / 'out' / 'm2' / 'logo.png').read_bytes() == b'same logo'
+        blobs = list((tmp_path / 'attachment-store').iterdir())
+        assert len(blobs) == 2
+
+    def test_get_attachments_skips_files_over_size_cap(self, tmp_path):
+        """Attachments over max_bytes should not be downloaded at all."""
+        from tools.gmail import get_attachments
+
+        messages = {'m1': self._message('m1', ('big.mov', 'a1', 5000), ('small.txt', 'a2', 10))}
+        service = self._service_with_attachments(messages, {'a1': b'x' * 5000, 'a2': b'small'})
+
+        with patch('tools.gmail.get_gmail', return_value=service):
+            downloaded = get_attachments('m1', output_dir=str(tmp_path), max_bytes=1000)
+
+        assert [p.name for p in downloaded] == ['small.txt']
+        fetched = [c[1]['id'] for c in service.users().messages().attachments().get.call_args_list]
+        assert fetched == ['a2']
+
+    def test_get_attachments_decodes_in_chunks(self, tmp_path):
+        """Chunked decoding should reproduce the original bytes exactly."""
+        from tools.gmail import get_attachments
+
+        content = bytes(range(256)) * 50
+        messages = {'m1': self._message('m1', ('blob.bin', 'a1', len(content)))}
+        service = self._service_with_attachments(messages, {'a1': content})
+
+        with patch('tools.gmail.get_gmail', return_value=service), \
+             patch('tools.gmail.DECODE_CHUNK', 64):
+            downloaded = get_attachments('m1', output_dir=str(tmp_path))
+
+        assert downloaded[0].read_bytes() == content
+
 
 @pytest.mark.unit
 class TestTextToHtml:
@@ -256,3 +830,29 @@ class TestExtractBody:
 
         result = _extract_body(payload)
         assert result == body_text
+
+
+@pytest.mark.unit
+class TestBatchGet:
+    """Tests for the _batch_get helper function."""
+
+    def test_batch_get_keeps_input_order(self, fake_batch):
+        """Results should follow the input order even if callbacks arrive out of order."""
+        from tools.gmail import _batch_get
+        from tests.conftest import FakeBatch
+
+        class ReversedBatch(FakeBatch):
+            def execute(self):
+                self.requests.reverse()
+                super().execute()
+
+        service = MagicMock()
+        service.new_batch_http_request.side_effect = lambda callback=None: ReversedBatch(callback)
+        service.users().messages().get.side_effect = lambda **kw: MagicMock(
+            execute=MagicMock(return_value={'id': kw['id']})
+        )
+
+        results = _batch_get(service, ['a', 'b', 'c', 'd'], batch_size=3)
+
+        assert [msg['id'] for _, msg, _ in results] == ['a', 'b', 'c', 'd']
+        assert all(error is None for _, _, error in results)
@@ -0,0 +1,197 @@
+"""
+Tests for tools/mailstore.py.
+Runs against a temporary SQLite database (see the tmp_mailstore fixture).
+"""
+
+import sqlite3
+import pytest
+
+
+def _email(msg_id, labels=('INBOX',), body=None):
+    """Build an email dict in the shape gmail._parse_message() returns."""
+    email = {
+        'id': msg_id,
+        'thread_id': f"t-{msg_id}",
+        'from': 'alice@example.com',
+        'to': 'me@example.com',
+        'subject': f"Subject {msg_id}",
+        'date': 'Mon, 2 Mar 2026 10:30:00 +0000',
+        'snippet': 'snippet',
+        'labels': list(labels),
+    }
+    if body is not None:
+        email['body'] = body
+    return email
+
+
+@pytest.mark.unit
+class TestMailStore:
+    """Tests for storing, relabelling, and listing emails."""
+
+    def test_list_emails_newest_first_and_filtered_by_label(self):
+        """Emails should come back by internalDate, filtered by label."""
+        from tools import mailstore
+
+        conn = mailstore.connect()
+        mailstore.save_email(conn, _email('old'), internal_date=1000)
+        mailstore.save_email(conn, _email('new'), internal_date=2000)
+        mailstore.save_email(conn, _email('sent', labels=['SENT']), internal_date=3000)
+
+        assert [e['id'] for e in mailstore.list_emails(conn, label='INBOX')] == ['new', 'old']
+        assert [e['id'] for e in mailstore.list_emails(conn, limit=1)] == ['sent']
+
+    def test_save_email_keeps_existing_body(self):
+        """A metadata refresh should not discard a stored body."""
+        from tools import mailstore
+
+        conn = mailstore.connect()
+        mailstore.save_email(conn, _email('m1', body='Full text'))
+        mailstore.save_email(conn, _email('m1', labels=['INBOX', 'STARRED']))
+
+        email = mailstore.list_emails(conn)[0]
+        assert email['body'] == 'Full text'
+        assert email['labels'] == ['INBOX', 'STARRED']
+
+    def test_update_labels_reports_unknown_messages(self):
+        """Label changes apply to stored emails and report missing ones."""
+        from tools import mailstore
+
+        conn = mailstore.connect()
+        mailstore.save_email(conn, _email('m1', labels=['INBOX', 'UNREAD']))
+
+        assert mailstore.update_labels(conn, 'm1', add=['STARRED'], remove=['UNREAD'])
+        assert not mailstore.update_labels(conn, 'missing', add=['INBOX'])
+        assert mailstore.list_emails(conn)[0]['labels'] == ['INBOX', 'STARRED']
+
+    def test_meta_round_trip_and_clear(self):
+        """Metadata should persist across connections until cleared."""
+        from tools import mailstore
+
+        conn = mailstore.connect()
+        with conn:
+            mailstore.set_meta(conn, 'history_id', 42)
+            mailstore.save_email(conn, _email('m1'))
+        conn.close()
+
+        conn = mailstore.connect()
+        assert mailstore.get_meta(conn, 'history_id') == '42'
+        mailstore.clear(conn)
+        assert mailstore.get_meta(conn, 'history_id') is None
+        assert mailstore.list_emails(conn) == []
+
+    def test_get_emails_can_require_a_body(self):
+        """Lookups by ID should optionally skip metadata-only emails."""
+        from tools import mailstore
+
+        conn = mailstore.connect()
+        mailstore.save_email(conn, _email('full', body='text'))
+        mailstore.save_email(conn, _email('meta'))
+
+        assert set(mailstore.get_emails(conn, ['full', 'meta', 'missing'])) == {'full', 'meta'}
+        assert set(mailstore.get_emails(conn, ['full', 'meta'], require_body=True)) == {'full'}
+
+    def test_attachments_are_kept_across_metadata_updates(self):
+        """A known attachment list should survive a save without one."""
+        from tools import mailstore
+
+        conn = mailstore.connect()
+        assert mailstore.get_attachments(conn, 'm1') is None
+        mailstore.save_email(conn, _email('m1', body='x'), attachments=[{'filename': 'a.pdf'}])
+        mailstore.save_email(conn, _email('m1'))
+
+        assert mailstore.get_attachments(conn, 'm1') == [{'filename': 'a.pdf'}]
+        assert mailstore.get_thread_id(conn, 'm1') == 't-m1'
+
+
+@pytest.mark.unit
+class TestMailStoreConnection:
+    """Tests for journal mode and schema upgrades."""
+
+    def test_connect_uses_wal_mode(self):
+        """The store should use WAL so tool processes can share it."""
+        from tools import mailstore
+
+        conn = mailstore.connect()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+    def test_connect_upgrades_older_stores(self, tmp_mailstore):
+        """A store created before the attachments column should be upgraded."""
+        from tools import mailstore
+
+        old = sqlite3.connect(str(tmp_mailstore))
+        old.execute(
+            "CREATE TABLE messages (id TEXT PRIMARY KEY, thread_id TEXT, sender TEXT, "
+            "recipients TEXT, subject TEXT, date TEXT, snippet TEXT, body TEXT, labels TEXT, "
+            "internal_date INTEGER)")
+        old.commit()
+        old.close()
+
+        conn = mailstore.connect()
+        mailstore.save_email(conn, _email('m1', body='x'), attachments=[])
+        assert mailstore.get_attachments(conn, 'm1') == []
+
+
+@pytest.mark.unit
+class TestSearch:
+    """Tests for offline full-text search."""
+
+    def _store(self):
+        from tools import mailstore
+
+        conn = mailstore.connect()
+        contract = dict(_email('c1', body='Attached is the signed contract for review.'),
+                        subject='Contract draft', **{'from': 'Sarah Chen <sarah@acme.com>'})
+        invoice = dict(_email('i1', body='Your invoice mentions the contract number.'),
+                       subject='Invoice', **{'from': 'billing@vendor.com'})
+        other = dict(_email('o1', body='Lunch on Friday?'), **{'from': 'sarah@acme.com'})
+        for email in (contract, invoice, other):
+            mailstore.save_email(conn, email)
+        return conn
+
+    def test_search_ranks_subject_matches_first(self):
+        """Every word must match, with subject/sender hits ranked higher."""
+        from tools import mailstore
+
+        conn = self._store()
+
+        assert [e['id'] for e in mailstore.search(conn, 'contract')] == ['c1', 'i1']
+        assert [e['id'] for e in mailstore.search(conn, 'sarah contract')] == ['c1']
+        assert '[signed]' in mailstore.search(conn, 'signed')[0]['match']
+
+    def test_search_handles_email_addresses(self):
+        """Punctuation in the query should not be treated as FTS syntax."""
+        from tools import mailstore
+
+        conn = self._store()
+
+        assert {e['id'] for e in mailstore.search(conn, 'sarah@acme.com')} == {'c1', 'o1'}
+        assert mailstore.search(conn, '"unbalanced') == []
+
+    def test_index_follows_updates_and_deletes(self):
+        """A body added later is searchable and deleted emails disappear."""
+        from tools import mailstore
+
+        conn = self._store()
+        mailstore.save_email(conn, _email('m9'))
+        assert mailstore.search(conn, 'quarterly') == []
+
+        mailstore.save_email(conn, _email('m9', body='Quarterly numbers attached'))
+        assert [e['id'] for e in mailstore.search(conn, 'quarterly')] == ['m9']
+
+        mailstore.delete_emails(conn, ['m9'])
+        assert mailstore.search(conn, 'quarterly') == []
+
+    def test_existing_stores_are_indexed(self, tmp_mailstore):
+        """Emails stored before the index existed should be searchable."""
+        from tools import mailstore
+
+        conn = mailstore.connect()
+        conn.executescript(
+            "DROP TRIGGER messages_fts_insert; DROP TRIGGER messages_fts_delete; "
+            "DROP TRIGGER messages_fts_update; DROP TABLE messages_fts;")
+        mailstore.save_email(conn, _email('old', body='legacy proposal'))
+        conn.commit()
+        conn.close()
+
+        conn = mailstore.connect()
+        assert [e['id'] for e in mailstore.search(conn, 'proposal')] == ['old']
@@ -0,0 +1,154 @@
+"""
+Tests for tools/mime.py.
+Payloads mirror the structure Gmail returns for format='full'.
+"""
+
+import base64
+import pytest
+from unittest.mock import patch
+
+
+def _part(mime_type, text, charset=None, filename=''):
+    """Build a leaf payload part with base64url body data."""
+    encoding = charset or 'utf-8'
+    part = {
+        'mimeType': mime_type,
+        'filename': filename,
+        'body': {'data': base64.urlsafe_b64encode(text.encode(encoding)).decode()},
+    }
+    if charset:
+        part['headers'] = [{'name': 'Content-Type', 'value': f'{mime_type}; charset="{charset}"'}]
+    return part
+
+
+@pytest.mark.unit
+class TestExtractText:
+    """Tests for finding and decoding the best text part."""
+
+    def test_finds_plain_text_nested_in_mixed_alternative(self):
+        """text/plain inside multipart/alternative inside multipart/mixed should be found."""
+        from tools.mime import extract_text
+
+        payload = {
+            'mimeType': 'multipart/mixed',
+            'parts': [
+                {'mimeType': 'multipart/alternative', 'parts': [
+                    _part('text/html', '<p>Hello <b>there</b></p>'),
+                    _part('text/plain', 'Hello there'),
+                ]},
+                _part('text/plain', 'notes in an attachment', filename='notes.txt'),
+            ],
+        }
+
+        assert extract_text(payload) == 'Hello there'
+
+    def test_html_only_mail_is_converted_to_text(self):
+        """HTML-only mail should fall back to converted text."""
+        from tools.mime import extract_text
+
+        payload = _part('text/html', (
+            '<html><head><style>p {color: red}</style></head><body>'
+            '<p>First &amp; foremost</p><div>Second<br>line</div>'
+            '<script>ignored()</script></body></html>'
+        ))
+
+        assert extract_text(payload) == 'First & foremost\n\nSecond\nline'
+
+    def test_non_utf8_charset_is_decoded(self):
+        """A declared charset should be used to decode the body."""
+        from tools.mime import extract_text
+
+        payload = _part('text/plain', 'Café crème, £5', charset='iso-8859-1')
+
+        assert extract_text(payload) == 'Café crème, £5'
+
+    def test_unknown_charset_falls_back_to_utf8(self):
+        """An unknown charset should not raise."""
+        from tools.mime import extract_text
+
+        payload = _part('text/plain', 'plain ascii')
+        payload['headers'] = [{'name': 'Content-Type', 'value': 'text/plain; charset=x-made-up'}]
+
+        assert extract_text(payload) == 'plain ascii'
+
+    def test_no_text_part_returns_empty_string(self):
+        """Messages with only attachments should have an empty body."""
+        from tools.mime import extract_text
+
+        payload = {'mimeType': 'multipart/mixed', 'parts': [
+            {'mimeType': 'application/pdf', 'filename': 'a.pdf', 'body': {'attachmentId': 'x'}},
+        ]}
+
+        assert extract_text(payload) == ''
+
+
+@pytest.mark.unit
+class TestBoundedDecoding:
+    """Tests that only as much of a body as needed is decoded."""
+
+    def test_large_plain_body_decodes_only_what_the_limit_needs(self):
+        """A multi-megabyte body should stop decoding after the first chunk."""
+        from tools import mime
+
+        payload = _part('text/plain', 'x' * 3_000_000)
+        decoded = []
+        real_decode = base64.urlsafe_b64decode
+
+        def counting_decode(chunk):
+            result = real_decode(chunk)
+            decoded.append(len(result))
+            return result
+
+        with patch('tools.mime.base64.urlsafe_b64decode', side_effect=counting_decode):
+            text = mime.extract_text(payload, limit=5000)
+
+        assert text == 'x' * 5000
+        assert sum(decoded) < 50_000
+
+    def test_multibyte_characters_split_across_chunks(self):
+        """Characters split across decode chunks should survive intact."""
+        from tools import mime
+
+        text = 'é€✓' * 500
+        with patch('tools.mime.DECODE_CHUNK', 8):
+            assert mime.extract_text(_part('text/plain', text)) == text
+
+    def test_large_html_body_stops_at_limit(self):
+        """HTML conversion should also stop once the limit is reached."""
+        from tools import mime
+
+        payload = _part('text/html', '<p>word</p>' * 200_000)
+
+        text = mime.extract_text(payload, limit=100)
+        assert len(text) == 100
+        assert text.startswith('word')
+
+
+@pytest.mark.unit
+class TestCollapseQuoted:
+    """Tests for removing quoted history from replies."""
+
+    def test_cuts_at_wrote_line_including_wrapped_ones(self):
+        """Text after an 'On ... wrote:' line, even a wrapped one, is dropped."""
+        from tools.mime import collapse_quoted
+
+        text = ("Sounds good, see you then.\n\nOn Mon, 2 Mar 2026 at 10:30, Alice Smith <\n"
+                "alice@example.com> wrote:\n> Can we meet Tuesday?\n> Thanks")
+
+        assert collapse_quoted(text) == 'Sounds good, see you then.'
+
+    def test_drops_inline_quoted_lines(self):
+        """Interleaved '>' lines are removed and the replies kept."""
+        from tools.mime import collapse_quoted
+
+        text = "> Budget?\nApproved.\n> Timeline?\nEnd of March."
+
+        assert collapse_quoted(text) == 'Approved.\nEnd of March.'
+
+    def test_cuts_at_original_message_marker(self):
+        """Outlook-style original message blocks are dropped."""
+        from tools.mime import collapse_quoted
+
+        text = "Thanks!\n\n-----Original Message-----\nFrom: Bob\nSubject: Hi"
+
+        assert collapse_quoted(text) == 'Thanks!'
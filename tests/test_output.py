@@ -0,0 +1,96 @@
+"""
+Tests for tools/output.py.
+Verifies streamed output matches the format of a single json.dump, and
+that NDJSON and stdout output stay clean.
+"""
+
+import io
+import json
+import pytest
+from unittest.mock import patch
+
+
+@pytest.mark.unit
+class TestJsonArrayWriter:
+    """Tests for the JsonArrayWriter class."""
+
+    def test_json_array_writer_matches_json_dump(self, tmp_path):
+        """Streamed records should produce the same text as json.dump(indent=2)."""
+        from tools.output import JsonArrayWriter
+
+        records = [{'id': 'a', 'labels': ['INBOX']}, {'id': 'b', 'nested': {'x': 1}}]
+        path = tmp_path / 'out.json'
+
+        with JsonArrayWriter(path) as writer:
+            for record in records:
+                writer.write(record)
+
+        assert path.read_text() == json.dumps(records, indent=2)
+        assert writer.count == 2
+
+    def test_json_array_writer_skips_empty_output(self, tmp_path):
+        """No file should be created when nothing was written."""
+        from tools.output import JsonArrayWriter
+
+        path = tmp_path / 'out.json'
+        with JsonArrayWriter(path):
+            pass
+
+        assert not path.exists()
+
+    def test_compact_writer_matches_compact_dump(self, tmp_path):
+        """Compact output should be one array with no whitespace."""
+        from tools.output import JsonArrayWriter
+
+        records = [{'id': 'a', 'labels': ['INBOX']}, {'id': 'b'}]
+        path = tmp_path / 'out.json'
+        with JsonArrayWriter(path, compact=True) as writer:
+            for record in records:
+                writer.write(record)
+
+        assert path.read_text() == json.dumps(records, separators=(',', ':'))
+
+
+@pytest.mark.unit
+class TestNdjsonWriter:
+    """Tests for NDJSON output and writing to stdout."""
+
+    def test_ndjson_writer_flushes_each_line(self, tmp_path):
+        """Each record should be readable as soon as it is written."""
+        from tools.output import open_writer
+
+        writer = open_writer(tmp_path, 'out.ndjson', 'ndjson')
+        writer.write({'id': 'a'})
+        assert (tmp_path / 'out.ndjson').read_text() == '{"id":"a"}\n'
+        writer.write({'id': 'b'})
+        writer.close()
+
+        lines = (tmp_path / 'out.ndjson').read_text().splitlines()
+        assert [json.loads(line)['id'] for line in lines] == ['a', 'b']
+
+    def test_open_writer_rejects_unknown_format(self, tmp_path):
+        """An unknown format should raise ValueError."""
+        from tools.output import open_writer
+
+        with pytest.raises(ValueError):
+            open_writer(tmp_path, 'out.xml', 'xml')
+
+    def test_progress_to_stderr_keeps_stdout_for_records(self, capsys):
+        """Inside progress_to_stderr, prints go to stderr and records to stdout."""
+        from tools.output import open_writer, progress_to_stderr
+
+        with progress_to_stderr():
+            print("Fetching...")
+            with open_writer(None, '-', 'ndjson') as writer:
+                writer.write({'id': 'a'})
+
+        captured = capsys.readouterr()
+        assert captured.out == '{"id":"a"}\n'
+        assert 'Fetching...' in captured.err
+
+    def test_empty_json_on_stdout_is_an_empty_array(self, capsys):
+        """JSON to stdout should always be valid, even with no records."""
+        from tools.output import open_writer
+
+        open_writer(None, '-', 'json').close()
+        assert json.loads(capsys.readouterr().out) == []
@@ -0,0 +1,136 @@
+"""
+Tests for tools/quota.py.
+Token buckets run on a fake clock, so no test actually sleeps.
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+class FakeClock:
+    """Monotonic clock whose sleep() just advances time."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+        self.slept += seconds
+
+
+@pytest.mark.unit
+class TestTokenBucket:
+    """Tests for the TokenBucket class."""
+
+    def test_bucket_allows_burst_then_paces(self):
+        """A full bucket serves a burst; later requests wait for refill."""
+        from tools.quota import TokenBucket
+
+        clock = FakeClock()
+        bucket = TokenBucket(rate=100, capacity=100, clock=clock, sleep=clock.sleep)
+
+        assert bucket.acquire(100) == 0
+        waited = bucket.acquire(50)
+
+        assert waited == pytest.approx(0.5)
+
+    def test_sustained_rate_stays_at_limit(self):
+        """Many small requests should run at the configured rate, not above it."""
+        from tools.quota import TokenBucket
+
+        clock = FakeClock()
+        bucket = TokenBucket(rate=225, capacity=225, clock=clock, sleep=clock.sleep)
+
+        for _ in range(450):
+            bucket.acquire(5)
+
+        # 2250 units at 225/s, less the initial full bucket
+        assert clock.now == pytest.approx((2250 - 225) / 225)
+
+    def test_cost_above_capacity_runs_into_debt(self):
+        """A request larger than the bucket should still run, then repay."""
+        from tools.quota import TokenBucket
+
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=10, clock=clock, sleep=clock.sleep)
+
+        assert bucket.acquire(25) == 0
+        assert bucket.acquire(10) == pytest.approx(2.5)
+
+
+@pytest.mark.unit
+class TestAcquire:
+    """Tests for per-method charging and usage reporting."""
+
+    def test_acquire_charges_method_costs(self):
+        """Each Gmail method should cost its published units."""
+        from tools import quota
+
+        quota.acquire('gmail.users.messages.get')
+        quota.acquire('gmail.users.drafts.create')
+        quota.acquire('calendar.events.list')
+
+        usage = quota.usage()
+        assert usage['gmail.users.messages.get']['units'] == 5
+        assert usage['gmail.users.drafts.create']['units'] == 10
+        assert usage['calendar.events.list']['units'] == 1
+
+    def test_charge_batch_counts_each_inner_request(self):
+        """A batch of 50 gets should cost 250 units."""
+        from tools import quota
+
+        requests = [MagicMock(methodId='gmail.users.messages.get') for _ in range(50)]
+        quota.charge_batch(requests)
+
+        assert quota.usage()['gmail.users.messages.get'] == {'calls': 50, 'units': 250, 'waited': 0.0}
+
+    def test_unknown_requests_are_not_charged(self):
+        """Requests without a method ID (such as test doubles) are ignored."""
+        from tools import quota
+
+        assert quota.acquire(MagicMock()) == 0.0
+        assert quota.usage() == {}
+
+    def test_report_usage_prints_totals_per_api(self, capsys):
+        """The report should go to stderr with units per API."""
+        from tools import quota
+
+        quota.acquire('gmail.users.messages.list')
+        quota.acquire('gmail.users.messages.get', count=3)
+        quota.report_usage()
+
+        assert '[quota] gmail 20 units / 4 calls' in capsys.readouterr().err
+
+    def test_buckets_use_configured_limits(self):
+        """Each API's bucket should run at the configured rate times headroom."""
+        from tools import quota
+
+        limits = {'per_minute': {'gmail': 600}, 'headroom': 0.5}
+        with patch('tools.quota.get_quota_limits', return_value=limits):
+            bucket = quota._bucket('gmail')
+            assert quota._bucket('drive') is None
+
+        assert bucket.rate == pytest.approx(5)
+
+
+@pytest.mark.unit
+class TestRequestBuilder:
+    """Tests for the HttpRequest subclass used by every service."""
+
+    def test_execute_charges_quota_first(self):
+        """Executing a request should charge its method before sending."""
+        from googleapiclient.http import HttpMockSequence
+        from tools import quota
+
+        http = HttpMockSequence([({'status': '200'}, '{"id": "m1"}')])
+        request = quota.request_builder()(
+            http, lambda resp, content: content, 'https://gmail.googleapis.com/x',
+            methodId='gmail.users.messages.get',
+        )
+
+        assert request.execute() == '{"id": "m1"}'
+        assert quota.usage()['gmail.users.messages.get']['calls'] == 1
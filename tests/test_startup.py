@@ -0,0 +1,71 @@
+"""
+Startup regression tests for the tool CLIs.
+Each check runs a fresh interpreter so import costs are measured cold.
+"""
+
+import os
+import re
+import sys
+import subprocess
+import pytest
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Cold import budget for all three tool modules together, in milliseconds.
+# The Google client libraries alone take several hundred, so this fails as
+# soon as one of them is imported eagerly again.
+IMPORT_BUDGET_MS = 150
+
+TOOL_MODULES = ['tools.gmail', 'tools.gcal', 'tools.gdrive']
+
+IMPORT_LINE = re.compile(r'import time:\s+\d+ \|\s+(\d+) \| (\S+)')
+
+
+def _run_python(*args):
+    """Run a fresh interpreter in the project root without the daemon."""
+    env = {**os.environ, 'FOUNDER_OS_NO_DAEMON': '1'}
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True, text=True, cwd=PROJECT_ROOT, env=env,
+    )
+
+
+@pytest.mark.unit
+class TestStartup:
+    """Tests for CLI cold-start cost."""
+
+    def test_tool_imports_skip_google_libraries(self):
+        """Importing the tools should not load any Google client library."""
+        result = _run_python('-c', (
+            f"import sys, {', '.join(TOOL_MODULES)}; "
+            "print(sorted(m for m in sys.modules "
+            "if m.split('.')[0] in ('google', 'googleapiclient', 'google_auth_oauthlib', "
+            "'google_auth_httplib2', 'httplib2')))"
+        ))
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == '[]'
+
+    def test_tool_imports_within_budget(self):
+        """Cold import of the tool modules should stay within IMPORT_BUDGET_MS."""
+        result = _run_python('-X', 'importtime', '-c', f"import {', '.join(TOOL_MODULES)}")
+
+        assert result.returncode == 0, result.stderr
+        cumulative = {
+            match.group(2): int(match.group(1)) / 1000
+            for match in map(IMPORT_LINE.match, result.stderr.splitlines())
+            if match
+        }
+        total = sum(cumulative.get(name, 0) for name in TOOL_MODULES)
+        assert total < IMPORT_BUDGET_MS, f"tool imports took {total:.0f} ms"
+
+    @pytest.mark.parametrize('tool', ['gmail', 'gcal', 'gdrive'])
+    def test_help_runs_without_google_libraries(self, tool):
+        """--help should work before any heavy import happens."""
+        script = PROJECT_ROOT / 'tools' / f'{tool}.py'
+        result = _run_python('-X', 'importtime', str(script), '--help')
+
+        assert result.returncode == 0
+        assert 'usage:' in result.stdout
+        assert 'googleapiclient' not in result.stderr
@@ -0,0 +1,132 @@
+"""
+Tests for tools/transport.py.
+Verifies the shared pooled transport reuses connections and stays thread-safe.
+"""
+
+import time
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+class FakeClient:
+    """Stand-in for AuthorizedHttp that opens one fake connection per host."""
+
+    created = 0
+
+    def __init__(self, credentials):
+        FakeClient.created += 1
+        self.connections = {}
+        self.calls = []
+        self.delay = 0
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        host = 'https:' + uri.split('/')[2]
+        if host not in self.connections:
+            self.connections[host] = MagicMock(sock=object())
+        self.calls.append(headers)
+        time.sleep(self.delay)
+        return {'status': '200'}, b'{}'
+
+    def close(self):
+        self.connections.clear()
+
+
+@pytest.fixture
+def fake_clients():
+    """Patch AuthorizedHttp so pooled clients never touch the network."""
+    FakeClient.created = 0
+    with patch('tools.transport._new_client', FakeClient):
+        yield FakeClient
+
+
+@pytest.mark.unit
+class TestPooledHttp:
+    """Tests for the PooledHttp class."""
+
+    def test_pooled_http_reuses_connection_per_host(self, fake_clients):
+        """Repeat requests to one host should reuse the same connection."""
+        from tools.transport import PooledHttp
+
+        pool = PooledHttp(MagicMock(), size=2)
+        pool.request('https://gmail.googleapis.com/gmail/v1/users/me/messages')
+        pool.request('https://gmail.googleapis.com/gmail/v1/users/me/labels')
+        pool.request('https://www.googleapis.com/drive/v3/files')
+
+        stats = pool.stats()
+        assert stats['requests'] == 3
+        assert stats['connections_opened'] == 2
+        assert stats['connections_reused'] == 1
+        assert stats['hosts']['gmail.googleapis.com'] == {'requests': 2, 'connections': 1}
+        assert stats['clients'] == 1
+
+    def test_pooled_http_requests_gzip(self, fake_clients):
+        """Requests should ask for gzip and mention it in the user agent."""
+        from tools.transport import PooledHttp
+
+        pool = PooledHttp(MagicMock(), size=1)
+        pool.request('https://www.googleapis.com/calendar/v3/x', headers={'user-agent': 'client/1.0'})
+
+        sent = pool._clients[0].calls[0]
+        assert sent['accept-encoding'] == 'gzip'
+        assert sent['user-agent'] == 'client/1.0 (gzip)'
+
+    def test_pooled_http_caps_clients_at_pool_size(self, fake_clients):
+        """Concurrent requests should never open more clients than the pool size."""
+        from tools.transport import PooledHttp
+
+        pool = PooledHttp(MagicMock(), size=2)
+        original_checkout = pool._checkout
+
+        def slow_checkout():
+            client = original_checkout()
+            client.delay = 0.01
+            return client
+
+        pool._checkout = slow_checkout
+
+        threads = [
+            threading.Thread(target=pool.request, args=('https://gmail.googleapis.com/x',))
+            for _ in range(10)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stats = pool.stats()
+        assert stats['requests'] == 10
+        assert stats['clients'] <= 2
+        assert stats['connections_opened'] <= 2
+
+
+@pytest.mark.unit
+class TestGetHttp:
+    """Tests for the get_http function."""
+
+    def test_get_http_shares_pool_for_same_credentials(self, fake_clients, tmp_config):
+        """Every service built with the same credentials should share one pool."""
+        from tools.transport import get_http
+
+        creds = MagicMock()
+
+        assert get_http(creds) is get_http(creds)
+
+    def test_get_http_replaces_pool_for_new_credentials(self, fake_clients, tmp_config):
+        """Re-authenticated credentials should get a fresh pool."""
+        from tools.transport import get_http
+
+        first = get_http(MagicMock())
+        second = get_http(MagicMock())
+
+        assert first is not second
+        assert second.credentials is not first.credentials
+
+    def test_get_http_uses_configured_pool_size(self, fake_clients, tmp_config):
+        """Pool size should come from the user config."""
+        from tools.config import save_config
+        from tools.transport import get_http
+
+        save_config({'http_pool_size': 8})
+
+        assert get_http(MagicMock()).size == 8
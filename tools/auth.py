@@ -5,13 +5,36 @@ Handles token acquisition, caching, and refresh for all Google APIs.
 Single token file covers Gmail, Calendar, and Drive.
 """
 
+import os
 import sys
+import time
+import argparse
+import importlib
+import threading
 from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.discovery import load_document
+from tools.quota import request_builder
+from tools.transport import get_http, transport_stats
+
+# Google client libraries take a few hundred milliseconds to import, so they
+# are loaded on first use rather than at import time (see _lazy)
+_LAZY_IMPORTS = {
+    'Request': ('google.auth.transport.requests', 'Request'),
+    'Credentials': ('google.oauth2.credentials', 'Credentials'),
+    'InstalledAppFlow': ('google_auth_oauthlib.flow', 'InstalledAppFlow'),
+    'build': ('googleapiclient.discovery', 'build'),
+    'build_from_document': ('googleapiclient.discovery', 'build_from_document'),
+}
 
 # All scopes requested in a single OAuth flow
 ALL_SCOPES = [
@@ -31,6 +54,22 @@ PROJECT_ROOT = Path(__file__).parent.parent
 CREDS_DIR = PROJECT_ROOT / '.credentials'
 CLIENT_SECRET_PATH = CREDS_DIR / 'client_secret.json'
 TOKEN_PATH = CREDS_DIR / 'token.json'
+LOCK_PATH = CREDS_DIR / 'token.lock'
+
+# Refresh the access token this long before it expires
+REFRESH_MARGIN = timedelta(minutes=5)
+
+# In-memory credentials shared by every service in this process
+_credentials = None
+_credentials_lock = threading.RLock()
+_refresh_timer = None
+_refresh_count = 0
+
+# Process-wide service registry: (api, version) -> (fingerprint, Resource).
+# Each service is built once and reused until the credentials behind it change.
+_services = {}
+_services_lock = threading.Lock()
+_service_stats = {'builds': 0, 'hits': 0, 'build_seconds': 0.0, 'hit_seconds': 0.0}
 
 
 def get_credentials(scopes=None):
@@ -40,6 +79,11 @@ def get_credentials(scopes=None):
     Uses a single token file for all services. Triggers browser-based
     auth flow if no valid token exists or if scopes have expanded.
 
+    Credentials are cached in memory for the life of the process and
+    refreshed shortly before they expire rather than after. Refreshes
+    and token writes happen under an advisory lock on token.lock, so
+    parallel tool invocations reuse one refresh instead of racing.
+
     Args:
         scopes: List of OAuth scopes. Defaults to ALL_SCOPES.
 
@@ -49,44 +93,171 @@ def get_credentials(scopes=None):
     Raises:
         FileNotFoundError: If client_secret.json is missing.
     """
+    global _credentials
+
     scopes = scopes or ALL_SCOPES
-    creds = None
 
-    if TOKEN_PATH.exists():
-        creds = Credentials.from_authorized_user_file(str(TOKEN_PATH), scopes)
+    with _credentials_lock:
+        if _credentials is not None and _is_usable(_credentials, scopes):
+            return _credentials
 
-        # Check if saved token is missing any required scopes
-        if creds and creds.scopes and set(scopes) - set(creds.scopes):
-            print("\nNew permissions needed. Re-authenticating...")
-            creds = None
+        creds = _load_token(scopes)
+
+        if not creds or not _is_usable(creds, scopes):
+            with _token_file_lock():
+                # Another process may have refreshed while we waited
+                creds = _load_token(scopes)
+                if not creds or not _is_usable(creds, scopes):
+                    creds = _renew(creds, scopes)
+
+        _credentials = creds
+        _schedule_refresh(creds)
+        return creds
+
+
+def _load_token(scopes):
+    """Read token.json, or None if missing or lacking required scopes."""
+    if not TOKEN_PATH.exists():
+        return None
+
+    creds = _lazy('Credentials').from_authorized_user_file(str(TOKEN_PATH), scopes)
+
+    # Check if saved token is missing any required scopes
+    if creds and creds.scopes and set(scopes) - set(creds.scopes):
+        print("\nNew permissions needed. Re-authenticating...")
+        return None
+
+    return creds
 
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            if not CLIENT_SECRET_PATH.exists():
-                print(f"ERROR: Client secret not found at {CLIENT_SECRET_PATH}")
-                print("\nRun 'python3 setup.py' to configure your credentials.")
-                sys.exit(1)
 
-            print("\nOpening browser for Google authorisation...")
-            print("Sign in with your Google account.\n")
+def _renew(creds, scopes):
+    """Refresh credentials, or run the browser flow, and save the result."""
+    global _refresh_count
 
-            flow = InstalledAppFlow.from_client_secrets_file(
-                str(CLIENT_SECRET_PATH), scopes
-            )
-            creds = flow.run_local_server(port=0)
+    if creds and creds.refresh_token and (creds.expired or _expires_soon(creds)):
+        creds.refresh(_lazy('Request')())
+        _refresh_count += 1
+    elif not creds or not creds.valid:
+        if not CLIENT_SECRET_PATH.exists():
+            print(f"ERROR: Client secret not found at {CLIENT_SECRET_PATH}")
+            print("\nRun 'python3 setup.py' to configure your credentials.")
+            sys.exit(1)
 
-        # Save token
-        CREDS_DIR.mkdir(parents=True, exist_ok=True)
-        TOKEN_PATH.write_text(creds.to_json())
+        print("\nOpening browser for Google authorisation...")
+        print("Sign in with your Google account.\n")
 
+        flow = _lazy('InstalledAppFlow').from_client_secrets_file(
+            str(CLIENT_SECRET_PATH), scopes
+        )
+        creds = flow.run_local_server(port=0)
+    else:
+        # Valid but expiring soon with no refresh token: use it as is
+        return creds
+
+    _save_token(creds)
     return creds
 
 
+def _is_usable(creds, scopes):
+    """True if credentials cover the scopes and are not about to expire."""
+    if creds.scopes and set(scopes) - set(creds.scopes):
+        return False
+    if not creds.valid:
+        return False
+    return not (creds.refresh_token and _expires_soon(creds))
+
+
+def _expires_soon(creds):
+    """True if the access token expires within REFRESH_MARGIN."""
+    expiry = creds.expiry
+    if not isinstance(expiry, datetime):
+        return False
+    return expiry - REFRESH_MARGIN <= _utcnow()
+
+
+def _utcnow():
+    """Naive UTC now, matching the expiry stored on google credentials."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _save_token(creds):
+    """Write token.json atomically with owner-only permissions."""
+    CREDS_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = TOKEN_PATH.with_name(f".{TOKEN_PATH.name}.{os.getpid()}.tmp")
+    fd = os.open(str(tmp), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(creds.to_json())
+    os.replace(tmp, TOKEN_PATH)
+
+
+@contextmanager
+def _token_file_lock():
+    """Hold an exclusive advisory lock on token.lock across processes."""
+    CREDS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(LOCK_PATH, 'a') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _schedule_refresh(creds):
+    """Start a background timer that refreshes just before expiry."""
+    global _refresh_timer
+
+    if _refresh_timer is not None:
+        _refresh_timer.cancel()
+        _refresh_timer = None
+
+    if not creds.refresh_token or not isinstance(creds.expiry, datetime):
+        return
+
+    delay = (creds.expiry - REFRESH_MARGIN - _utcnow()).total_seconds()
+    if delay <= 0:
+        return
+
+    _refresh_timer = threading.Timer(delay, _background_refresh)
+    _refresh_timer.daemon = True
+    _refresh_timer.start()
+
+
+def _background_refresh():
+    """Timer callback: refresh the cached credentials ahead of expiry."""
+    try:
+        get_credentials()
+    except Exception as e:
+        # The next foreground call will retry and surface the error
+        print(f"Background token refresh failed: {e}", file=sys.stderr)
+
+
+def clear_credentials_cache():
+    """Forget cached credentials and cancel any scheduled refresh."""
+    global _credentials, _refresh_timer
+
+    with _credentials_lock:
+        _credentials = None
+        if _refresh_timer is not None:
+            _refresh_timer.cancel()
+            _refresh_timer = None
+
+
+def credential_stats():
+    """Return the number of token refreshes performed by this process."""
+    return {'refreshes': _refresh_count, 'cached': _credentials is not None}
+
+
 def get_service(api, version):
     """
-    Build and return an authenticated Google API service.
+    Return an authenticated Google API service.
+
+    Services are memoised per process. The cached Resource is returned
+    as long as the access token and scopes it was built with are
+    unchanged; a refreshed token or new scopes trigger a rebuild.
+    Builds use the offline discovery cache when a document is available,
+    and every service shares one pooled HTTP transport.
 
     Args:
         api: API name ('gmail', 'calendar', 'drive')
@@ -95,5 +266,104 @@ def get_service(api, version):
     Returns:
         googleapiclient.discovery.Resource object.
     """
+    started = time.perf_counter()
     creds = get_credentials()
-    return build(api, version, credentials=creds)
+    fingerprint = _credentials_fingerprint(creds)
+    key = (api, version)
+
+    with _services_lock:
+        cached = _services.get(key)
+        if cached and cached[0] == fingerprint:
+            _service_stats['hits'] += 1
+            _service_stats['hit_seconds'] += time.perf_counter() - started
+            return cached[1]
+
+        http = get_http(creds)
+        document = load_document(api, version)
+        if document:
+            service = _lazy('build_from_document')(document, http=http,
+                                                   requestBuilder=request_builder())
+        else:
+            service = _lazy('build')(api, version, http=http, requestBuilder=request_builder())
+        _services[key] = (fingerprint, service)
+        _service_stats['builds'] += 1
+        _service_stats['build_seconds'] += time.perf_counter() - started
+        return service
+
+
+def clear_service_cache():
+    """Drop every memoised service so the next call rebuilds it."""
+    with _services_lock:
+        _services.clear()
+
+
+def service_stats():
+    """
+    Report how services were obtained in this process.
+
+    Returns:
+        Dict with build/hit counts and the average time in milliseconds
+        for a cold build and for a cached hit.
+    """
+    with _services_lock:
+        stats = dict(_service_stats)
+    stats['avg_build_ms'] = _average_ms(stats['build_seconds'], stats['builds'])
+    stats['avg_hit_ms'] = _average_ms(stats['hit_seconds'], stats['hits'])
+    return stats
+
+
+def _credentials_fingerprint(creds):
+    """Identify the token and scopes a service was built with."""
+    return (creds.token, tuple(sorted(creds.scopes or [])))
+
+
+def _average_ms(total_seconds, count):
+    """Average a running total in milliseconds, 0 when nothing was counted."""
+    return round(total_seconds * 1000 / count, 3) if count else 0.0
+
+
+def _lazy(name):
+    """Return a lazily imported Google client name, importing it if needed."""
+    if name in globals():
+        return globals()[name]
+    return __getattr__(name)
+
+
+def __getattr__(name):
+    """Resolve lazy imports on attribute access (also lets tests patch them)."""
+    if name not in _LAZY_IMPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, attr = _LAZY_IMPORTS[name]
+    value = getattr(importlib.import_module(module), attr)
+    globals()[name] = value
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Google authentication for Founder OS')
+    subparsers = parser.add_subparsers(dest='command', help='Commands')
+
+    # Stats
+    subparsers.add_parser('stats', help='Compare cold service builds with cached lookups')
+
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        for api, version in (('gmail', 'v1'), ('calendar', 'v3'), ('drive', 'v3')):
+            get_service(api, version)
+            get_service(api, version)
+        stats = service_stats()
+        print(f"Service builds: {stats['builds']} (avg {stats['avg_build_ms']} ms)")
+        print(f"Cached hits:    {stats['hits']} (avg {stats['avg_hit_ms']} ms)")
+        print(f"Token refreshes: {credential_stats()['refreshes']}")
+        pool = transport_stats()
+        if pool:
+            print(f"HTTP pool:      {pool['clients']}/{pool['pool_size']} clients, "
+                  f"{pool['connections_opened']} connections opened, "
+                  f"{pool['connections_reused']} reused")
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -21,6 +21,11 @@ DEFAULTS = {
     'preferred_meeting_duration': 30,
     'preferred_meeting_days': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'],
     'preferred_meeting_times': {'start': '09:00', 'end': '17:00'},
+    'http_pool_size': 4,
+    # Per-user quota per minute (Gmail in quota units, others in requests),
+    # and the fraction of it the tools aim to use
+    'quota_per_minute': {'gmail': 15000, 'calendar': 600, 'drive': 12000},
+    'quota_headroom': 0.9,
 }
 
 
@@ -72,3 +77,16 @@ def get_meeting_preferences():
         'days': config['preferred_meeting_days'],
         'times': config['preferred_meeting_times'],
     }
+
+
+def get_http_pool_size():
+    """Return how many HTTP clients the shared transport may open."""
+    return max(1, int(load_config()['http_pool_size']))
+
+
+def get_quota_limits():
+    """Return per-API quota per minute and the headroom factor."""
+    config = load_config()
+    per_minute = dict(DEFAULTS['quota_per_minute'])
+    per_minute.update(config['quota_per_minute'])
+    return {'per_minute': per_minute, 'headroom': float(config['quota_headroom'])}
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Warm tool daemon for Founder OS.
+Keeps the Gmail, Calendar, and Drive tools loaded, authenticated, and
+connected in one long-lived process on a Unix socket. The tool CLIs
+forward to it when it is running and run in-process when it is not.
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+from pathlib import Path
+from contextlib import redirect_stdout, redirect_stderr
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.config import PROJECT_ROOT, TEMP_DIR
+
+TOOLS_DIR = PROJECT_ROOT / 'tools'
+LOG_PATH = TEMP_DIR / 'daemon.log'
+
+# Tools the daemon can run, by CLI name
+TOOLS = {
+    'gmail': 'tools.gmail',
+    'gcal': 'tools.gcal',
+    'gdrive': 'tools.gdrive',
+}
+
+# Shut down after this many seconds without a request
+DEFAULT_IDLE_TIMEOUT = 30 * 60
+
+# Set this to run every command in-process, even with a daemon running
+DISABLE_ENV = 'FOUNDER_OS_NO_DAEMON'
+
+CONNECT_TIMEOUT = 0.5
+
+
+def socket_path():
+    """
+    Return the daemon's socket path.
+
+    Uses _temp/ when the path fits the Unix socket length limit,
+    otherwise a per-project path in the system temp directory.
+    """
+    path = TEMP_DIR / 'daemon.sock'
+    if len(str(path)) < 100:
+        return path
+
+    import hashlib
+    import tempfile
+
+    digest = hashlib.sha1(str(PROJECT_ROOT).encode()).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"founder-os-{digest}.sock"
+
+
+def forward_to_daemon(tool, argv=None):
+    """
+    Run a CLI command in the daemon if one is listening.
+
+    Streams the command's output to this process and exits with its
+    exit code. Returns without doing anything when no daemon is
+    available, so the caller can run the command in-process.
+
+    Args:
+        tool: CLI name ('gmail', 'gcal', 'gdrive').
+        argv: Command-line arguments (default: sys.argv[1:]).
+    """
+    if os.environ.get(DISABLE_ENV):
+        return
+
+    argv = sys.argv[1:] if argv is None else argv
+    started = time.perf_counter()
+    streams = {'stdout': sys.stdout, 'stderr': sys.stderr}
+
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(str(socket_path()))
+    except (OSError, AttributeError):
+        return
+
+    with sock:
+        sock.settimeout(None)
+        _send(sock, {'tool': tool, 'argv': argv, 'cwd': os.getcwd()})
+        reply = _receive(sock)
+
+        exit_code = None
+        for message in reply:
+            if 'stream' in message:
+                stream = streams[message['stream']]
+                stream.write(message['data'])
+                stream.flush()
+            elif message.get('restart'):
+                # Daemon is running stale code; fall back to in-process
+                return
+            elif 'exit' in message:
+                exit_code = message['exit']
+                break
+
+    if exit_code is None:
+        # Connection dropped mid-command; the output so far is all we have
+        exit_code = 1
+
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"[daemon] {tool} {' '.join(argv[:1])}: {elapsed:.0f} ms", file=streams['stderr'])
+    sys.exit(exit_code)
+
+
+def serve(idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """
+    Run the daemon in the foreground until stopped or idle.
+
+    Args:
+        idle_timeout: Seconds without a request before shutting down.
+    """
+    path = socket_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        if _ping():
+            print(f"Daemon already running on {path}")
+            return
+        path.unlink()
+
+    modules = _load_tools()
+    state = {
+        'started': time.time(),
+        'code_mtime': _code_mtime(),
+        'commands': {},
+    }
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    os.chmod(path, 0o600)
+    server.listen(8)
+    server.settimeout(idle_timeout)
+    print(f"Daemon listening on {path} (pid {os.getpid()})")
+
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                print("Idle timeout reached, shutting down.")
+                break
+            with conn:
+                if not _handle(conn, modules, state):
+                    break
+    finally:
+        server.close()
+        path.unlink(missing_ok=True)
+
+
+def start(idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """Start the daemon in the background and wait until it answers."""
+    import subprocess
+
+    if _ping():
+        print(f"Daemon already running on {socket_path()}")
+        return True
+
+    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(LOG_PATH, 'a') as log:
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), 'serve',
+             '--idle-timeout', str(idle_timeout)],
+            stdout=log, stderr=log, stdin=subprocess.DEVNULL,
+            start_new_session=True,
+            env={**os.environ, DISABLE_ENV: '1'},
+        )
+
+    for _ in range(100):
+        if _ping():
+            print(f"Daemon started on {socket_path()}")
+            return True
+        time.sleep(0.1)
+
+    print(f"ERROR: Daemon did not start. See {LOG_PATH}")
+    return False
+
+
+def stop():
+    """Ask a running daemon to shut down."""
+    reply = _control({'control': 'shutdown'})
+    if reply is None:
+        print("Daemon is not running.")
+    else:
+        print("Daemon stopped.")
+
+
+def status():
+    """
+    Report on the running daemon.
+
+    Returns:
+        Status dict with uptime and per-command latency, or None.
+    """
+    return _control({'control': 'status'})
+
+
+def _handle(conn, modules, state):
+    """Serve one connection. Returns False when the daemon should stop."""
+    request = next(_receive(conn), None)
+    if request is None:
+        return True
+
+    control = request.get('control')
+    if control == 'ping':
+        _send(conn, {'ok': True})
+        return True
+    if control == 'status':
+        _send(conn, _status(state))
+        return True
+    if control == 'shutdown':
+        _send(conn, {'ok': True})
+        return False
+
+    if _code_mtime() > state['code_mtime']:
+        # Tool code changed since start: let the client run it fresh
+        _send(conn, {'restart': True})
+        return False
+
+    tool = request.get('tool')
+    if tool not in modules:
+        _send(conn, {'stream': 'stderr', 'data': f"Unknown tool: {tool}\n"})
+        _send(conn, {'exit': 2})
+        return True
+
+    argv = request.get('argv', [])
+    started = time.perf_counter()
+    exit_code = _run(conn, tool, modules[tool], argv, request.get('cwd'))
+    elapsed = (time.perf_counter() - started) * 1000
+
+    key = f"{tool} {argv[0] if argv else ''}".strip()
+    timing = state['commands'].setdefault(key, {'count': 0, 'total_ms': 0.0})
+    timing['count'] += 1
+    timing['total_ms'] += elapsed
+
+    _send(conn, {'exit': exit_code, 'elapsed_ms': round(elapsed, 1)})
+    return True
+
+
+def _run(conn, tool, module, argv, cwd):
+    """Run a tool's main() with its output streamed back over the socket."""
+    stdout = _SocketStream(conn, 'stdout')
+    stderr = _SocketStream(conn, 'stderr')
+    previous_cwd = os.getcwd()
+    previous_argv = sys.argv
+
+    try:
+        if cwd:
+            os.chdir(cwd)
+        # argparse names the program after sys.argv[0]
+        sys.argv = [f"{tool}.py"] + list(argv)
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            module.main(argv)
+        return 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            return e.code or 0
+        stderr.write(f"{e.code}\n")
+        return 1
+    except Exception:
+        import traceback
+        stderr.write(traceback.format_exc())
+        return 1
+    finally:
+        sys.argv = previous_argv
+        os.chdir(previous_cwd)
+
+
+def _load_tools():
+    """Import every tool module so its dependencies stay warm."""
+    import importlib
+
+    return {name: importlib.import_module(module) for name, module in TOOLS.items()}
+
+
+def _status(state):
+    """Build the status reply from daemon state and the shared caches."""
+    from tools.auth import service_stats, credential_stats
+    from tools.transport import transport_stats
+
+    commands = {
+        name: {'count': t['count'], 'avg_ms': round(t['total_ms'] / t['count'], 1)}
+        for name, t in state['commands'].items()
+    }
+    return {
+        'pid': os.getpid(),
+        'uptime_seconds': round(time.time() - state['started']),
+        'commands': commands,
+        'services': service_stats(),
+        'credentials': credential_stats(),
+        'transport': transport_stats(),
+    }
+
+
+def _control(message):
+    """Send a control message and return the reply, or None if not running."""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5)
+            sock.connect(str(socket_path()))
+            _send(sock, message)
+            return next(_receive(sock), None)
+    except (OSError, AttributeError):
+        return None
+
+
+def _ping():
+    """True if a daemon is answering on the socket."""
+    return _control({'control': 'ping'}) is not None
+
+
+def _code_mtime():
+    """Latest modification time of the tool sources."""
+    return max(p.stat().st_mtime for p in TOOLS_DIR.glob('*.py'))
+
+
+def _send(sock, message):
+    """Write one JSON message as a line."""
+    sock.sendall(json.dumps(message).encode('utf-8') + b'\n')
+
+
+def _receive(sock):
+    """Yield JSON messages read line by line until the peer closes."""
+    with sock.makefile('rb') as lines:
+        for line in lines:
+            yield json.loads(line)
+
+
+class _SocketStream(io.TextIOBase):
+    """Text stream that forwards every write to the client as it happens."""
+
+    def __init__(self, sock, name):
+        self._sock = sock
+        self._name = name
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if data:
+            _send(self._sock, {'stream': self._name, 'data': data})
+        return len(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Warm tool daemon for Founder OS')
+    subparsers = parser.add_subparsers(dest='command', help='Commands')
+
+    # Start / serve
+    for name, help_text in (('start', 'Start the daemon in the background'),
+                            ('serve', 'Run the daemon in the foreground')):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument('--idle-timeout', type=int, default=DEFAULT_IDLE_TIMEOUT,
+                         help='Seconds without a request before shutting down')
+
+    # Stop
+    subparsers.add_parser('stop', help='Stop the daemon')
+
+    # Status
+    subparsers.add_parser('status', help='Show daemon status and command latency')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'start':
+        if not start(idle_timeout=args.idle_timeout):
+            sys.exit(1)
+    elif args.command == 'serve':
+        serve(idle_timeout=args.idle_timeout)
+    elif args.command == 'stop':
+        stop()
+    elif args.command == 'status':
+        info = status()
+        if info is None:
+            print("Daemon is not running.")
+        else:
+            print(json.dumps(info, indent=2))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Offline discovery document cache for Founder OS.
+Keeps compact copies of the Gmail, Calendar, and Drive discovery documents
+under .credentials/discovery/ so services can be built without a network
+round trip or a full parse of the upstream document.
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.config import CREDS_DIR
+
+DISCOVERY_DIR = CREDS_DIR / 'discovery'
+INDEX_NAME = 'index.json'
+
+# Bump when the on-disk layout or compaction rules change
+CACHE_FORMAT = 1
+
+# APIs used by the Founder OS tools
+APIS = [('gmail', 'v1'), ('calendar', 'v3'), ('drive', 'v3')]
+
+REMOTE_URL = 'https://{api}.googleapis.com/$discovery/rest?version={version}'
+
+# Keys that only feed generated docstrings; dropping them shrinks the parse
+_DOC_ONLY_KEYS = {'description', 'enumDescriptions'}
+
+
+def load_document(api, version):
+    """
+    Return the cached discovery document for an API.
+
+    Seeds the cache from the client library's bundled copy on first use.
+
+    Args:
+        api: API name ('gmail', 'calendar', 'drive').
+        version: API version ('v1', 'v3').
+
+    Returns:
+        Discovery document as a JSON string, or None if none is available.
+    """
+    entry = _read_index().get(f"{api}.{version}")
+    if entry and entry.get('format') == CACHE_FORMAT:
+        path = DISCOVERY_DIR / entry['file']
+        if path.exists():
+            return path.read_text()
+
+    document = _bundled_document(api, version)
+    if document is None:
+        return None
+    return _store(api, version, document, source='bundled')
+
+
+def refresh_documents(remote=False, apis=None):
+    """
+    Rebuild the discovery cache.
+
+    Args:
+        remote: Fetch the latest documents from Google instead of
+            copying the client library's bundled versions.
+        apis: List of (api, version) pairs. Defaults to APIS.
+
+    Returns:
+        Dict of 'api.version' to the cached revision.
+    """
+    refreshed = {}
+    for api, version in apis or APIS:
+        if remote:
+            document = _remote_document(api, version)
+            source = 'remote'
+        else:
+            document = _bundled_document(api, version)
+            source = 'bundled'
+
+        if document is None:
+            print(f"  - {api} {version}: no document available")
+            continue
+
+        _store(api, version, document, source=source)
+        revision = _read_index()[f"{api}.{version}"]['revision']
+        refreshed[f"{api}.{version}"] = revision
+        print(f"  - {api} {version}: revision {revision} ({source})")
+
+    return refreshed
+
+
+def _store(api, version, document, source):
+    """Compact a document, write it atomically, and record it in the index."""
+    compact = _compact(json.loads(document))
+    revision = compact.get('revision', 'unknown')
+    filename = f"{api}.{version}.{revision}.json"
+    text = json.dumps(compact, separators=(',', ':'))
+
+    DISCOVERY_DIR.mkdir(parents=True, exist_ok=True)
+    _write_atomic(DISCOVERY_DIR / filename, text)
+
+    index = _read_index()
+    previous = index.get(f"{api}.{version}")
+    index[f"{api}.{version}"] = {
+        'file': filename,
+        'revision': revision,
+        'source': source,
+        'format': CACHE_FORMAT,
+        'cached_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    _write_atomic(DISCOVERY_DIR / INDEX_NAME, json.dumps(index, indent=2))
+
+    if previous and previous['file'] != filename:
+        (DISCOVERY_DIR / previous['file']).unlink(missing_ok=True)
+
+    return text
+
+
+def _compact(node):
+    """Drop documentation-only keys from a discovery document."""
+    if isinstance(node, dict):
+        return {k: _compact(v) for k, v in node.items() if k not in _DOC_ONLY_KEYS}
+    if isinstance(node, list):
+        return [_compact(v) for v in node]
+    return node
+
+
+def _read_index():
+    """Load the cache index, empty if it does not exist or is unreadable."""
+    path = DISCOVERY_DIR / INDEX_NAME
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text())
+    except ValueError:
+        return {}
+
+
+def _write_atomic(path, text):
+    """Write text to a sibling temp file and rename it into place."""
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def _bundled_document(api, version):
+    """Read the discovery document shipped with google-api-python-client."""
+    try:
+        from googleapiclient.discovery_cache import get_static_doc
+    except ImportError:
+        return None
+    return get_static_doc(api, version)
+
+
+def _remote_document(api, version):
+    """Download the current discovery document from Google."""
+    import urllib.request
+
+    url = REMOTE_URL.format(api=api, version=version)
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return response.read().decode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Discovery document cache for Founder OS')
+    subparsers = parser.add_subparsers(dest='command', help='Commands')
+
+    # Refresh
+    refresh_parser = subparsers.add_parser('refresh', help='Rebuild the discovery cache')
+    refresh_parser.add_argument('--remote', action='store_true',
+                                help='Download the latest documents from Google')
+
+    # Status
+    subparsers.add_parser('status', help='Show cached documents')
+
+    args = parser.parse_args()
+
+    if args.command == 'refresh':
+        print(f"Refreshing discovery cache in {DISCOVERY_DIR}...")
+        refresh_documents(remote=args.remote)
+    elif args.command == 'status':
+        index = _read_index()
+        if not index:
+            print("Discovery cache is empty.")
+        for name, entry in sorted(index.items()):
+            print(f"  {name:<12}  revision {entry['revision']}  "
+                  f"({entry['source']}, cached {entry['cached_at']})")
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,6 @@ List, create, check availability, and delete calendar events.
 """
 
 import sys
-import json
 import argparse
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -13,8 +12,11 @@ from zoneinfo import ZoneInfo
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from tools import quota
 from tools.auth import get_service
+from tools.daemon import forward_to_daemon
 from tools.config import OUTPUT_DIR, get_timezone
+from tools.output import FORMATS, open_writer, progress_to_stderr
 
 
 def get_calendar():
@@ -75,14 +77,15 @@ def format_event(event):
     }
 
 
-def list_events(days=7, max_results=20, output_file=None):
+def list_events(days=7, max_results=20, output_file=None, fmt='json'):
     """
     List upcoming calendar events.
 
     Args:
         days: Number of days to look ahead.
         max_results: Maximum number of events.
-        output_file: Optional output filename.
+        output_file: Optional output filename, or '-' for stdout.
+        fmt: Output format: 'json', 'compact', or 'ndjson'.
 
     Returns:
         List of formatted event dicts.
@@ -111,25 +114,25 @@ def list_events(days=7, max_results=20, output_file=None):
 
     formatted = []
     current_date = None
+    writer = open_writer(OUTPUT_DIR, output_file, fmt) if output_file else None
 
     for event in events:
-        fmt = format_event(event)
-        formatted.append(fmt)
+        item = format_event(event)
+        formatted.append(item)
+        if writer:
+            writer.write(item)
 
-        if fmt['date'] != current_date:
-            current_date = fmt['date']
+        if item['date'] != current_date:
+            current_date = item['date']
             print(f"\n  {current_date}")
 
-        attendee_count = len(fmt['attendees'])
-        attendee_str = f" ({attendee_count} attendees)" if fmt['attendees'] else ""
-        print(f"    {fmt['time']}  {fmt['summary']}{attendee_str}")
+        attendee_count = len(item['attendees'])
+        attendee_str = f" ({attendee_count} attendees)" if item['attendees'] else ""
+        print(f"    {item['time']}  {item['summary']}{attendee_str}")
 
-    if output_file:
-        OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-        output_path = OUTPUT_DIR / output_file
-        with open(output_path, 'w') as f:
-            json.dump(formatted, f, indent=2)
-        print(f"\nSaved {len(formatted)} events to {output_path}")
+    if writer:
+        writer.close()
+        print(f"\nSaved {len(formatted)} events to {writer.name}")
 
     return formatted
 
@@ -284,7 +287,10 @@ def delete_event(event_id):
     print(f"Event deleted: {event_id}")
 
 
-def main():
+def main(argv=None):
+    if argv is None:
+        forward_to_daemon('gcal')
+
     parser = argparse.ArgumentParser(description='Google Calendar API for Founder OS')
     subparsers = parser.add_subparsers(dest='command', help='Commands')
 
@@ -292,7 +298,8 @@ def main():
     list_parser = subparsers.add_parser('list', help='List upcoming events')
     list_parser.add_argument('-d', '--days', type=int, default=7, help='Days to look ahead')
     list_parser.add_argument('-n', '--max', type=int, default=20, help='Max events')
-    list_parser.add_argument('-o', '--output', help='Output filename')
+    list_parser.add_argument('-o', '--output', help="Output filename ('-' for stdout)")
+    list_parser.add_argument('--format', choices=FORMATS, default='json', help='Output format')
 
     # Create
     create_parser = subparsers.add_parser('create', help='Create an event')
@@ -318,10 +325,13 @@ def main():
     # Auth
     subparsers.add_parser('auth', help='Test authentication')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    quota.reset_usage()
 
     if args.command == 'list':
-        list_events(days=args.days, max_results=args.max, output_file=args.output)
+        with progress_to_stderr(args.output == '-'):
+            list_events(days=args.days, max_results=args.max, output_file=args.output,
+                        fmt=args.format)
     elif args.command == 'create':
         create_event(
             summary=args.title,
@@ -343,6 +353,8 @@ def main():
     else:
         parser.print_help()
 
+    quota.report_usage()
+
 
 if __name__ == '__main__':
     main()
@@ -6,17 +6,17 @@ List, search, read, and download files from Google Drive.
 
 import io
 import sys
-import json
 import argparse
 from pathlib import Path
 from datetime import datetime
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from googleapiclient.http import MediaIoBaseDownload
-
+from tools import quota
 from tools.auth import get_service
+from tools.daemon import forward_to_daemon
 from tools.config import OUTPUT_DIR, TEMP_DIR
+from tools.output import FORMATS, open_writer, progress_to_stderr
 
 
 # Google Workspace MIME types and their export formats
@@ -32,7 +32,8 @@ def get_drive():
     return get_service('drive', 'v3')
 
 
-def list_files(max_results=20, folder_id=None, mime_type=None, output_file=None):
+def list_files(max_results=20, folder_id=None, mime_type=None, output_file=None,
+               fmt='json'):
     """
     List recent files from Google Drive.
 
@@ -40,7 +41,8 @@ def list_files(max_results=20, folder_id=None, mime_type=None, output_file=None)
         max_results: Maximum number of files to return.
         folder_id: Filter by parent folder ID.
         mime_type: Filter by MIME type.
-        output_file: Optional output filename.
+        output_file: Optional output filename, or '-' for stdout.
+        fmt: Output format: 'json', 'compact', or 'ndjson'.
 
     Returns:
         List of file metadata dicts.
@@ -69,29 +71,30 @@ def list_files(max_results=20, folder_id=None, mime_type=None, output_file=None)
         print("No files found.")
         return []
 
+    writer = open_writer(OUTPUT_DIR, output_file, fmt) if output_file else None
     for f in files:
+        if writer:
+            writer.write(f)
         modified = f.get('modifiedTime', '')[:10]
         size = _format_size(int(f.get('size', 0))) if f.get('size') else ''
         print(f"  {modified}  {f['name']:<40}  {size}")
 
-    if output_file:
-        OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-        output_path = OUTPUT_DIR / output_file
-        with open(output_path, 'w') as out:
-            json.dump(files, out, indent=2)
-        print(f"\nSaved {len(files)} files to {output_path}")
+    if writer:
+        writer.close()
+        print(f"\nSaved {len(files)} files to {writer.name}")
 
     return files
 
 
-def search_files(query_text, max_results=20, output_file=None):
+def search_files(query_text, max_results=20, output_file=None, fmt='json'):
     """
     Search files by name or content.
 
     Args:
         query_text: Search query string.
         max_results: Maximum number of results.
-        output_file: Optional output filename.
+        output_file: Optional output filename, or '-' for stdout.
+        fmt: Output format: 'json', 'compact', or 'ndjson'.
 
     Returns:
         List of matching file metadata dicts.
@@ -113,16 +116,16 @@ def search_files(query_text, max_results=20, output_file=None):
         print("No matching files found.")
         return []
 
+    writer = open_writer(OUTPUT_DIR, output_file, fmt) if output_file else None
     for f in files:
+        if writer:
+            writer.write(f)
         modified = f.get('modifiedTime', '')[:10]
         print(f"  {modified}  {f['name']}")
 
-    if output_file:
-        OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-        output_path = OUTPUT_DIR / output_file
-        with open(output_path, 'w') as out:
-            json.dump(files, out, indent=2)
-        print(f"\nSaved {len(files)} results to {output_path}")
+    if writer:
+        writer.close()
+        print(f"\nSaved {len(files)} results to {writer.name}")
 
     return files
 
@@ -237,12 +240,16 @@ def get_file_info(file_id):
 
 def _download_binary(service, file_id, name, output_dir=None):
     """Download a binary file from Drive."""
+    from googleapiclient.http import MediaIoBaseDownload
+
     request = service.files().get_media(fileId=file_id)
     buffer = io.BytesIO()
     downloader = MediaIoBaseDownload(buffer, request)
 
     done = False
     while not done:
+        # Chunk requests go straight to the transport, so charge each one
+        quota.acquire(request.methodId)
         _, done = downloader.next_chunk()
 
     save_dir = Path(output_dir) if output_dir else TEMP_DIR
@@ -267,7 +274,10 @@ def _format_size(size_bytes):
     return f"{size_bytes:.1f} TB"
 
 
-def main():
+def main(argv=None):
+    if argv is None:
+        forward_to_daemon('gdrive')
+
     parser = argparse.ArgumentParser(description='Google Drive API for Founder OS')
     subparsers = parser.add_subparsers(dest='command', help='Commands')
 
@@ -276,13 +286,15 @@ def main():
     list_parser.add_argument('-n', '--max', type=int, default=20, help='Max files')
     list_parser.add_argument('--folder', help='Filter by folder ID')
     list_parser.add_argument('--type', help='Filter by MIME type')
-    list_parser.add_argument('-o', '--output', help='Output filename')
+    list_parser.add_argument('-o', '--output', help="Output filename ('-' for stdout)")
+    list_parser.add_argument('--format', choices=FORMATS, default='json', help='Output format')
 
     # Search
     search_parser = subparsers.add_parser('search', help='Search files')
     search_parser.add_argument('query', help='Search query')
     search_parser.add_argument('-n', '--max', type=int, default=20, help='Max results')
-    search_parser.add_argument('-o', '--output', help='Output filename')
+    search_parser.add_argument('-o', '--output', help="Output filename ('-' for stdout)")
+    search_parser.add_argument('--format', choices=FORMATS, default='json', help='Output format')
 
     # Read
     read_parser = subparsers.add_parser('read', help='Read file content')
@@ -300,13 +312,17 @@ def main():
     # Auth
     subparsers.add_parser('auth', help='Test authentication')
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    quota.reset_usage()
 
     if args.command == 'list':
-        list_files(max_results=args.max, folder_id=args.folder,
-                   mime_type=args.type, output_file=args.output)
+        with progress_to_stderr(args.output == '-'):
+            list_files(max_results=args.max, folder_id=args.folder, mime_type=args.type,
+                       output_file=args.output, fmt=args.format)
     elif args.command == 'search':
-        search_files(args.query, max_results=args.max, output_file=args.output)
+        with progress_to_stderr(args.output == '-'):
+            search_files(args.query, max_results=args.max, output_file=args.output,
+                         fmt=args.format)
     elif args.command == 'read':
         content = read_file(args.file_id)
         if isinstance(content, str) and not content.startswith('/'):
@@ -321,6 +337,8 @@ def main():
     else:
         parser.print_help()
 
+    quota.report_usage()
+
 
 if __name__ == '__main__':
     main()
@@ -1,21 +1,82 @@
 #!/usr/bin/env python3
 """
 Gmail API tool for Founder OS.
-Fetches emails, creates drafts, archives messages, and downloads attachments.
+Fetches and syncs emails, creates drafts, archives messages, and downloads attachments.
 """
 
+import os
 import sys
 import json
 import html
+import time
 import base64
+import shutil
+import hashlib
 import argparse
+import threading
 from pathlib import Path
 from datetime import datetime
+from email.utils import getaddresses
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
+from tools import mailstore, quota
+from tools.mime import extract_text, collapse_quoted
 from tools.auth import get_service
+from tools.daemon import forward_to_daemon
 from tools.config import OUTPUT_DIR, TEMP_DIR
+from tools.output import FORMATS, open_writer, default_filename, progress_to_stderr
+
+# Gmail allows 100 calls per batch, but larger batches trip the per-user
+# concurrency limit; 50 is the size Google recommends
+BATCH_SIZE = 50
+
+# messages.list returns at most 500 IDs per page
+LIST_PAGE_SIZE = 500
+
+# Fetch modes: 'full' downloads and decodes bodies; 'metadata' asks only
+# for the headers and fields triage needs, via a partial response
+FETCH_MODES = {
+    'full': {'format': 'full'},
+    'metadata': {
+        'format': 'metadata',
+        'metadataHeaders': ['From', 'To', 'Cc', 'Subject', 'Date'],
+        'fields': 'id,threadId,labelIds,snippet,internalDate,sizeEstimate,payload/headers',
+    },
+}
+
+# Thread fetch modes, as FETCH_MODES but for threads.get
+THREAD_MODES = {
+    'full': {
+        'format': 'full',
+        'fields': 'id,messages(id,threadId,labelIds,snippet,internalDate,payload)',
+    },
+    'metadata': {
+        'format': 'metadata',
+        'metadataHeaders': ['From', 'To', 'Cc', 'Subject', 'Date'],
+        'fields': 'id,messages(id,threadId,labelIds,snippet,internalDate,payload/headers)',
+    },
+}
+
+# Body characters kept per email; only this much of a body is decoded
+BODY_CHARS = 5000
+
+# batchModify accepts at most 1000 message IDs per call
+BATCH_MODIFY_LIMIT = 1000
+
+# Labels removed to archive a message, and attempts per batchModify call
+ARCHIVE_LABELS = ['INBOX', 'UNREAD']
+ARCHIVE_ATTEMPTS = 2
+
+# Attachments: content-addressed store, size cap, download concurrency,
+# and base64 characters decoded at a time (a multiple of 4)
+ATTACHMENT_STORE = TEMP_DIR / 'attachment-store'
+MAX_ATTACHMENT_BYTES = 25 * 1024 * 1024
+ATTACHMENT_WORKERS = 4
+DECODE_CHUNK = 64 * 1024
+
+# History record types that incremental sync applies to the local store
+HISTORY_TYPES = ['messageAdded', 'messageDeleted', 'labelAdded', 'labelRemoved']
 
 
 def get_gmail():
@@ -23,69 +84,440 @@ def get_gmail():
     return get_service('gmail', 'v1')
 
 
-def fetch_emails(max_results=20, query='in:inbox', output_file=None):
+def iter_messages(query='in:inbox', limit=20, batch_size=BATCH_SIZE, **params):
+    """
+    Yield messages matching a query, following nextPageToken lazily.
+
+    Each page of IDs is fetched in batches and its messages are yielded
+    before the next page is requested, so memory stays bounded by one
+    page no matter how many messages match.
+
+    Args:
+        query: Gmail search query.
+        limit: Maximum number of messages to yield (None for all).
+        batch_size: Messages per batch request; 1 fetches serially.
+        **params: Extra messages.get parameters (default format='full').
+
+    Yields:
+        Gmail message resources, in list order.
+    """
+    service = get_gmail()
+    params.setdefault('format', 'full')
+    step = max(batch_size, 1)
+
+    for ids in _list_pages(service, query, limit):
+        for start in range(0, len(ids), step):
+            for msg_id, message, error in _batch_get(service, ids[start:start + step], batch_size, **params):
+                if error is not None:
+                    print(f"  ! Could not fetch {msg_id}: {error}")
+                    continue
+                yield message
+
+
+def _list_pages(service, query, limit, resource='messages'):
+    """Yield lists of message (or thread) IDs, one list per list() page."""
+    page_token = None
+    remaining = limit
+
+    while remaining is None or remaining > 0:
+        page_size = LIST_PAGE_SIZE if remaining is None else min(remaining, LIST_PAGE_SIZE)
+        list_params = {'userId': 'me', 'maxResults': page_size, 'q': query}
+        if page_token:
+            list_params['pageToken'] = page_token
+
+        page = getattr(service.users(), resource)().list(**list_params).execute()
+        ids = [item['id'] for item in page.get(resource, [])][:page_size]
+        if ids:
+            yield ids
+
+        if remaining is not None:
+            remaining -= len(ids)
+        page_token = page.get('nextPageToken')
+        if not page_token or not ids:
+            break
+
+
+def _iter_emails(query, limit, batch_size, mode, conn=None):
+    """
+    Yield parsed emails for a query, reading through the local store.
+
+    Messages already stored (with a body, in 'full' mode) are served from
+    the store; the rest are fetched in batches and saved to it.
+    """
+    service = get_gmail()
+    include_body = mode == 'full'
+    step = max(batch_size, 1)
+
+    for ids in _list_pages(service, query, limit):
+        for start in range(0, len(ids), step):
+            chunk = ids[start:start + step]
+            stored = mailstore.get_emails(conn, chunk, require_body=include_body) if conn else {}
+            missing = [msg_id for msg_id in chunk if msg_id not in stored]
+
+            fetched = {}
+            for msg_id, message, error in _batch_get(service, missing, batch_size, **FETCH_MODES[mode]):
+                if error is not None:
+                    print(f"  ! Could not fetch {msg_id}: {error}")
+                    continue
+                fetched[msg_id] = _parse_message(message, include_body=include_body)
+                if conn:
+                    _store_message(conn, message, fetched[msg_id])
+            if conn and fetched:
+                conn.commit()
+
+            for msg_id in chunk:
+                email = fetched.get(msg_id) or stored.get(msg_id)
+                if email is None:
+                    continue
+                if not include_body:
+                    email.pop('body', None)
+                yield email
+
+
+def fetch_emails(max_results=20, query='in:inbox', output_file=None, batch_size=BATCH_SIZE,
+                 collect=True, mode='full', use_cache=True, fmt='json'):
     """
     Fetch emails from Gmail and save to output folder.
 
+    Results are paged, fetched in batches, and written to the output
+    file as they arrive. A message that fails to fetch is reported and
+    skipped without failing its batch. Messages already in the local
+    store are not downloaded again; only the listing hits the API.
+
+    In 'metadata' mode only headers, snippet, and labels are requested,
+    which is all triage needs; use get_messages() afterwards to pull
+    full bodies for the messages that matter.
+
     Args:
         max_results: Maximum number of emails to fetch.
         query: Gmail search query (default: inbox emails).
-        output_file: Output filename (default: YYYY-MM-DD-emails.json).
+        output_file: Output filename (default: YYYY-MM-DD-emails.json),
+            or '-' for stdout.
+        batch_size: Messages per batch request; 1 fetches serially.
+        collect: Keep every email in memory and return them. Pass False
+            for very large fetches to run in constant memory.
+        mode: 'full' (with bodies) or 'metadata' (headers only).
+        use_cache: Read through the local message store. Labels of
+            stored messages may be stale until the next sync.
+        fmt: Output format: 'json', 'compact', or 'ndjson'.
 
     Returns:
-        List of email dicts, or None if no emails found.
+        List of email dicts (or the number saved when collect is False),
+        or None if no emails found.
     """
-    service = get_gmail()
+    if mode not in FETCH_MODES:
+        raise ValueError(f"Unknown fetch mode: {mode}")
 
-    print(f"Fetching emails (query: {query})...")
+    print(f"Fetching emails (query: {query}, mode: {mode})...")
 
-    results = service.users().messages().list(
-        userId='me',
-        maxResults=max_results,
-        q=query
-    ).execute()
-
-    messages = results.get('messages', [])
+    if not output_file:
+        output_file = default_filename(f"{datetime.now().strftime('%Y-%m-%d')}-emails", fmt)
 
-    if not messages:
+    conn = mailstore.connect() if use_cache else None
+    emails = []
+    try:
+        with open_writer(OUTPUT_DIR, output_file, fmt) as writer:
+            for email in _iter_emails(query, max_results, batch_size, mode, conn):
+                writer.write(email)
+                if collect:
+                    emails.append(email)
+                print(f"  - {(email['subject'] or '(no subject)')[:50]}")
+    finally:
+        if conn:
+            conn.close()
+
+    if not writer.count:
         print("No emails found.")
         return None
 
+    print(f"\nSaved {writer.count} emails to {writer.name}")
+    return emails if collect else writer.count
+
+
+def get_messages(message_ids, output_file=None, batch_size=BATCH_SIZE, fmt='json'):
+    """
+    Fetch full messages, with bodies, by ID.
+
+    Pairs with fetch_emails(mode='metadata'): triage on headers first,
+    then pull bodies only for the messages the user selects.
+
+    Args:
+        message_ids: List of message IDs.
+        output_file: Output filename (default: YYYY-MM-DD-messages.json),
+            or '-' for stdout.
+        batch_size: Messages per batch request; 1 fetches serially.
+        fmt: Output format: 'json', 'compact', or 'ndjson'.
+
+    Returns:
+        List of email dicts in the order requested.
+    """
+    service = get_gmail()
+    conn = mailstore.connect()
+
+    print(f"Fetching {len(message_ids)} full message(s)...")
+
+    try:
+        stored = mailstore.get_emails(conn, message_ids, require_body=True)
+        missing = [msg_id for msg_id in message_ids if msg_id not in stored]
+        fetched = {}
+        with conn:
+            for msg_id, message, error in _batch_get(service, missing, batch_size, format='full'):
+                if error is not None:
+                    print(f"  ! Could not fetch {msg_id}: {error}")
+                    continue
+                fetched[msg_id] = _parse_message(message)
+                _store_message(conn, message, fetched[msg_id])
+    finally:
+        conn.close()
+
     emails = []
-    for msg in messages:
-        full_msg = service.users().messages().get(
-            userId='me',
-            id=msg['id'],
-            format='full'
-        ).execute()
-
-        headers = {h['name']: h['value'] for h in full_msg['payload']['headers']}
-
-        body = _extract_body(full_msg['payload'])
-
-        emails.append({
-            'id': msg['id'],
-            'thread_id': msg['threadId'],
-            'from': headers.get('From', ''),
-            'to': headers.get('To', ''),
-            'subject': headers.get('Subject', ''),
-            'date': headers.get('Date', ''),
-            'snippet': full_msg.get('snippet', ''),
-            'body': body[:5000],
-            'labels': full_msg.get('labelIds', []),
-        })
-        print(f"  - {headers.get('Subject', '(no subject)')[:50]}")
-
-    # Save to output
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    for msg_id in message_ids:
+        email = fetched.get(msg_id) or stored.get(msg_id)
+        if email is None:
+            continue
+        emails.append(email)
+        print(f"  - {(email['subject'] or '(no subject)')[:50]}")
+
     if not output_file:
-        output_file = f"{datetime.now().strftime('%Y-%m-%d')}-emails.json"
+        output_file = default_filename(f"{datetime.now().strftime('%Y-%m-%d')}-messages", fmt)
+    with open_writer(OUTPUT_DIR, output_file, fmt) as writer:
+        for email in emails:
+            writer.write(email)
+
+    if emails:
+        print(f"\nSaved {len(emails)} messages to {writer.name}")
+    return emails
+
+
+def sync_mailbox(label='INBOX', max_results=100, output_file=None, full=False,
+                 batch_size=BATCH_SIZE, fmt='json'):
+    """
+    Bring the local message store up to date and save the labelled emails.
+
+    The first run (or a run with full=True) lists the label and stores
+    up to max_results messages. Later runs call history.list from the
+    stored historyId and apply only the messages added, deleted, and
+    relabelled since then, so an unchanged inbox costs one request. If
+    Gmail no longer has that history, a full resync runs instead.
+
+    Messages are stored in metadata form; use get_messages() for bodies.
+
+    Args:
+        label: Label ID to mirror (default: INBOX).
+        max_results: Messages to list on a full sync, and to save.
+        output_file: Output filename (default: YYYY-MM-DD-emails.json),
+            or '-' for stdout.
+        full: Ignore the stored historyId and resync from scratch.
+        batch_size: Messages per batch request; 1 fetches serially.
+        fmt: Output format: 'json', 'compact', or 'ndjson'.
+
+    Returns:
+        List of email dicts with the label, newest first.
+    """
+    service = get_gmail()
+    conn = mailstore.connect()
+
+    try:
+        history_id = mailstore.get_meta(conn, 'history_id')
+        if mailstore.get_meta(conn, 'sync_label') != label:
+            history_id = None
+
+        if history_id and not full:
+            try:
+                print(f"Syncing {label} since history {history_id}...")
+                with conn:
+                    _apply_history(service, conn, history_id, label, batch_size)
+            except Exception as e:
+                if not _history_expired(e):
+                    raise
+                print("  History has expired, running a full resync.")
+                history_id = None
+
+        if not history_id or full:
+            print(f"Running a full sync of {label} (up to {max_results} messages)...")
+            with conn:
+                _full_sync(service, conn, label, max_results, batch_size)
+
+        emails = mailstore.list_emails(conn, label=label, limit=max_results)
+    finally:
+        conn.close()
 
-    output_path = OUTPUT_DIR / output_file
-    with open(output_path, 'w') as f:
-        json.dump(emails, f, indent=2)
+    if not output_file:
+        output_file = default_filename(f"{datetime.now().strftime('%Y-%m-%d')}-emails", fmt)
+    with open_writer(OUTPUT_DIR, output_file, fmt) as writer:
+        for email in emails:
+            writer.write(email)
 
-    print(f"\nSaved {len(emails)} emails to {output_path}")
+    print(f"\nSaved {len(emails)} emails to {writer.name}")
+    return emails
+
+
+def _full_sync(service, conn, label, max_results, batch_size):
+    """Replace the store's contents with a fresh listing of the label."""
+    # Read the historyId first so changes made during the listing are
+    # replayed by the next incremental sync rather than lost
+    profile = service.users().getProfile(userId='me').execute()
+
+    mailstore.clear(conn)
+    count = 0
+    for message in iter_messages(f"label:{label}", max_results, batch_size, **FETCH_MODES['metadata']):
+        _store_message(conn, message, _parse_message(message, include_body=False))
+        count += 1
+
+    mailstore.set_meta(conn, 'history_id', profile['historyId'])
+    mailstore.set_meta(conn, 'sync_label', label)
+    print(f"  Stored {count} messages.")
+
+
+def _apply_history(service, conn, history_id, label, batch_size):
+    """Apply every history record since history_id to the store."""
+    history = service.users().history()
+    params = {'userId': 'me', 'startHistoryId': history_id, 'historyTypes': HISTORY_TYPES}
+    to_fetch = {}
+    counts = {'added': 0, 'deleted': 0, 'relabelled': 0}
+
+    while True:
+        page = history.list(**params).execute()
+
+        for record in page.get('history', []):
+            for item in record.get('messagesAdded', []):
+                message = item['message']
+                if label in message.get('labelIds', []):
+                    to_fetch[message['id']] = True
+
+            for item in record.get('messagesDeleted', []):
+                msg_id = item['message']['id']
+                to_fetch.pop(msg_id, None)
+                mailstore.delete_emails(conn, [msg_id])
+                counts['deleted'] += 1
+
+            for key, change in (('labelsAdded', 'add'), ('labelsRemoved', 'remove')):
+                for item in record.get(key, []):
+                    msg_id = item['message']['id']
+                    known = mailstore.update_labels(conn, msg_id, **{change: item.get('labelIds', [])})
+                    if known:
+                        counts['relabelled'] += 1
+                    elif change == 'add' and label in item.get('labelIds', []):
+                        # Newly labelled message we have not seen before
+                        to_fetch[msg_id] = True
+
+        history_id = page.get('historyId', history_id)
+        if not page.get('nextPageToken'):
+            break
+        params['pageToken'] = page['nextPageToken']
+
+    ids = list(to_fetch)
+    for msg_id, message, error in _batch_get(service, ids, batch_size, **FETCH_MODES['metadata']):
+        if error is not None:
+            print(f"  ! Could not fetch {msg_id}: {error}")
+            continue
+        _store_message(conn, message, _parse_message(message, include_body=False))
+        counts['added'] += 1
+
+    mailstore.set_meta(conn, 'history_id', history_id)
+    print(f"  {counts['added']} added, {counts['deleted']} deleted, "
+          f"{counts['relabelled']} relabelled.")
+
+
+def _history_expired(error):
+    """True if history.list rejected the start historyId as too old."""
+    return getattr(getattr(error, 'resp', None), 'status', None) == 404
+
+
+def fetch_threads(max_results=10, query='in:inbox', output_file=None, batch_size=BATCH_SIZE,
+                  mode='full', fmt='json'):
+    """
+    Fetch whole conversations, one compact record per thread.
+
+    Threads are listed for the query and fetched with batched
+    threads.get calls. Quoted history is collapsed from each message
+    body, so a reply chain reads once rather than once per reply.
+
+    Args:
+        max_results: Maximum number of threads.
+        query: Gmail search query (default: inbox).
+        output_file: Output filename (default: YYYY-MM-DD-threads.json),
+            or '-' for stdout.
+        batch_size: Threads per batch request; 1 fetches serially.
+        mode: 'full' (with bodies) or 'metadata' (headers only).
+        fmt: Output format: 'json', 'compact', or 'ndjson'.
+
+    Returns:
+        List of thread dicts, or None if no threads found.
+    """
+    if mode not in THREAD_MODES:
+        raise ValueError(f"Unknown fetch mode: {mode}")
+
+    service = get_gmail()
+    include_body = mode == 'full'
+
+    print(f"Fetching threads (query: {query}, mode: {mode})...")
+
+    if not output_file:
+        output_file = default_filename(f"{datetime.now().strftime('%Y-%m-%d')}-threads", fmt)
+
+    threads = []
+    conn = mailstore.connect()
+    try:
+        with open_writer(OUTPUT_DIR, output_file, fmt) as writer:
+            for ids in _list_pages(service, query, max_results, resource='threads'):
+                fetched = _batch_get(service, ids, batch_size, resource='threads', **THREAD_MODES[mode])
+                for thread_id, thread, error in fetched:
+                    if error is not None:
+                        print(f"  ! Could not fetch thread {thread_id}: {error}")
+                        continue
+                    with conn:
+                        for message in thread.get('messages', []):
+                            _store_message(conn, message, _parse_message(message, include_body))
+                    record = _parse_thread(thread, include_body)
+                    writer.write(record)
+                    threads.append(record)
+                    print(f"  - {(record['subject'] or '(no subject)')[:50]} "
+                          f"({record['message_count']} messages)")
+    finally:
+        conn.close()
+
+    if not threads:
+        print("No threads found.")
+        return None
+
+    print(f"\nSaved {len(threads)} threads to {writer.name}")
+    return threads
+
+
+def search_local(query, max_results=20, output_file=None, fmt='json'):
+    """
+    Search previously fetched emails without calling the API.
+
+    Uses the full-text index in the local message store, which every
+    fetch, get, and sync keeps up to date.
+
+    Args:
+        query: Words to find, such as 'sarah contract'.
+        max_results: Maximum number of results.
+        output_file: Optional output filename, or '-' for stdout.
+        fmt: Output format: 'json', 'compact', or 'ndjson'.
+
+    Returns:
+        List of email dicts, best match first.
+    """
+    conn = mailstore.connect()
+    try:
+        started = time.perf_counter()
+        emails = mailstore.search(conn, query, limit=max_results)
+        elapsed = (time.perf_counter() - started) * 1000
+    finally:
+        conn.close()
+
+    print(f"{len(emails)} local match(es) for: {query} ({elapsed:.1f} ms)")
+    for email in emails:
+        print(f"  - {email['id']}  {email['from'][:30]:<30}  {(email['subject'] or '(no subject)')[:50]}")
+
+    if output_file and emails:
+        with open_writer(OUTPUT_DIR, output_file, fmt) as writer:
+            for email in emails:
+                writer.write(email)
+        print(f"\nSaved {len(emails)} emails to {writer.name}")
     return emails
 
 
@@ -117,11 +549,7 @@ def create_draft(to, subject, body, reply_to_id=None, cc=None):
     draft_body = {'message': {'raw': raw}}
 
     if reply_to_id:
-        original = service.users().messages().get(
-            userId='me',
-            id=reply_to_id
-        ).execute()
-        draft_body['message']['threadId'] = original['threadId']
+        draft_body['message']['threadId'] = _thread_id(service, reply_to_id)
 
     draft = service.users().drafts().create(
         userId='me',
@@ -133,83 +561,133 @@ def create_draft(to, subject, body, reply_to_id=None, cc=None):
     return draft
 
 
-def archive_emails(message_ids):
+def archive_emails(message_ids=None, query=None):
     """
     Archive emails by removing INBOX and UNREAD labels.
 
+    Uses batchModify, so each call archives up to BATCH_MODIFY_LIMIT
+    messages. Removing labels is idempotent, so a failed call is simply
+    retried; IDs whose call still fails are reported, not raised.
+
     Args:
         message_ids: List of message IDs to archive.
+        query: Gmail search query; every matching message is archived.
+            Only IDs are listed, messages are never downloaded.
+
+    Returns:
+        Dict with 'archived' and 'failed' lists of message IDs.
     """
     service = get_gmail()
 
-    print(f"Archiving {len(message_ids)} emails...")
-
-    for msg_id in message_ids:
-        service.users().messages().modify(
-            userId='me',
-            id=msg_id,
-            body={'removeLabelIds': ['INBOX', 'UNREAD']}
-        ).execute()
-        print(f"  - Archived {msg_id}")
-
-    print(f"\nArchived {len(message_ids)} emails.")
-
-
-def get_attachments(message_id, output_dir=None):
+    ids = list(message_ids or [])
+    if query:
+        print(f"Listing messages matching: {query}")
+        for page in _list_pages(service, query, None):
+            ids.extend(page)
+    ids = list(dict.fromkeys(ids))
+
+    print(f"Archiving {len(ids)} emails...")
+
+    archived, failed = [], []
+    for start in range(0, len(ids), BATCH_MODIFY_LIMIT):
+        chunk = ids[start:start + BATCH_MODIFY_LIMIT]
+        error = None
+        for _ in range(ARCHIVE_ATTEMPTS):
+            try:
+                service.users().messages().batchModify(
+                    userId='me',
+                    body={'ids': chunk, 'removeLabelIds': ARCHIVE_LABELS}
+                ).execute()
+                error = None
+                break
+            except Exception as e:
+                error = e
+        if error is None:
+            archived.extend(chunk)
+            print(f"  - Archived {len(chunk)} emails")
+        else:
+            failed.extend(chunk)
+            print(f"  ! Could not archive {len(chunk)} emails: {error}")
+
+    if archived:
+        conn = mailstore.connect()
+        try:
+            with conn:
+                for msg_id in archived:
+                    mailstore.update_labels(conn, msg_id, remove=ARCHIVE_LABELS)
+        finally:
+            conn.close()
+
+    print(f"\nArchived {len(archived)} emails.")
+    if failed:
+        print(f"Failed to archive {len(failed)} emails: {', '.join(failed)}")
+    return {'archived': archived, 'failed': failed}
+
+
+def get_attachments(message_ids, output_dir=None, max_bytes=MAX_ATTACHMENT_BYTES,
+                    workers=ATTACHMENT_WORKERS):
     """
-    Download attachments from an email.
+    Download attachments from one or more emails.
+
+    Attachments are downloaded concurrently. Each file is decoded to disk
+    a chunk at a time and kept once in a content-addressed store keyed by
+    SHA-256, then linked to output_dir/<message id>/<filename>, so files
+    repeated across messages (logos, signature images) are stored once.
 
     Args:
-        message_id: Gmail message ID.
+        message_ids: Gmail message ID, or a list of them.
         output_dir: Directory to save attachments (default: _temp/attachments).
+        max_bytes: Skip attachments larger than this (None for no limit).
+        workers: Number of concurrent downloads.
 
     Returns:
         List of downloaded file paths.
     """
-    service = get_gmail()
-
-    print(f"Fetching attachments for message {message_id}...")
+    from concurrent.futures import ThreadPoolExecutor
 
-    message = service.users().messages().get(
-        userId='me',
-        id=message_id,
-        format='full'
-    ).execute()
-
-    if output_dir:
-        from pathlib import Path
-        save_dir = Path(output_dir)
-    else:
-        save_dir = TEMP_DIR / 'attachments'
-    save_dir.mkdir(parents=True, exist_ok=True)
+    if isinstance(message_ids, str):
+        message_ids = [message_ids]
+    service = get_gmail()
 
-    downloaded = []
+    print(f"Fetching attachments for {len(message_ids)} message(s)...")
 
-    def process_parts(parts):
-        for part in parts:
-            filename = part.get('filename', '')
-            if filename and part.get('body', {}).get('attachmentId'):
-                attachment_id = part['body']['attachmentId']
-                attachment = service.users().messages().attachments().get(
-                    userId='me',
-                    messageId=message_id,
-                    id=attachment_id
-                ).execute()
+    save_dir = Path(output_dir) if output_dir else TEMP_DIR / 'attachments'
 
-                data = base64.urlsafe_b64decode(attachment['data'])
-                filepath = save_dir / filename
-                with open(filepath, 'wb') as f:
-                    f.write(data)
+    conn = mailstore.connect()
+    try:
+        parts = {msg_id: mailstore.get_attachments(conn, msg_id) for msg_id in message_ids}
+        missing = [msg_id for msg_id, found in parts.items() if found is None]
 
-                downloaded.append(filepath)
-                print(f"  - Saved: {filename}")
+        def load(msg_id):
+            return service.users().messages().get(userId='me', id=msg_id, format='full').execute()
 
-            if 'parts' in part:
-                process_parts(part['parts'])
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+            messages = list(pool.map(load, missing))
+        with conn:
+            for message in messages:
+                parts[message['id']] = _attachment_parts(message.get('payload', {}))
+                _store_message(conn, message, _parse_message(message))
+    finally:
+        conn.close()
 
-    payload = message.get('payload', {})
-    if 'parts' in payload:
-        process_parts(payload['parts'])
+    jobs = []
+    for msg_id in message_ids:
+        for part in parts[msg_id]:
+            if max_bytes and part.get('size', 0) > max_bytes:
+                print(f"  ! Skipped {part['filename']} ({part['size']} bytes, over the size limit)")
+                continue
+            jobs.append((msg_id, part))
+
+    def download(job):
+        msg_id, part = job
+        try:
+            return _download_attachment(service, msg_id, part, save_dir, max_bytes)
+        except Exception as e:
+            print(f"  ! Could not download {part['filename']}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        downloaded = [path for path in pool.map(download, jobs) if path is not None]
 
     if not downloaded:
         print("  No attachments found.")
@@ -219,15 +697,207 @@ def get_attachments(message_id, output_dir=None):
     return downloaded
 
 
-def _extract_body(payload):
-    """Extract plain text body from email payload."""
-    if 'body' in payload and payload['body'].get('data'):
-        return base64.urlsafe_b64decode(payload['body']['data']).decode('utf-8')
-    elif 'parts' in payload:
-        for part in payload['parts']:
-            if part['mimeType'] == 'text/plain' and part['body'].get('data'):
-                return base64.urlsafe_b64decode(part['body']['data']).decode('utf-8')
-    return ''
+def _download_attachment(service, message_id, part, save_dir, max_bytes=None):
+    """Download one attachment into the content store and link it into save_dir."""
+    attachment = service.users().messages().attachments().get(
+        userId='me',
+        messageId=message_id,
+        id=part['attachment_id']
+    ).execute()
+    data = attachment['data']
+    del attachment
+
+    ATTACHMENT_STORE.mkdir(parents=True, exist_ok=True)
+    tmp = ATTACHMENT_STORE / f".{message_id}.{part['attachment_id'][:16]}.{threading.get_ident()}.tmp"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp, 'wb') as f:
+            # Decode a slice at a time; slices are a multiple of 4 characters
+            for start in range(0, len(data), DECODE_CHUNK):
+                chunk = base64.urlsafe_b64decode(data[start:start + DECODE_CHUNK])
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise ValueError(f"larger than {max_bytes} bytes")
+                digest.update(chunk)
+                f.write(chunk)
+        blob = ATTACHMENT_STORE / digest.hexdigest()
+        if blob.exists():
+            tmp.unlink()
+        else:
+            os.replace(tmp, blob)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+    # Path(...).name drops any directory parts a sender put in the filename
+    filepath = save_dir / message_id / Path(part['filename']).name
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    filepath.unlink(missing_ok=True)
+    try:
+        os.link(blob, filepath)
+    except OSError:
+        shutil.copyfile(blob, filepath)
+
+    print(f"  - Saved: {part['filename']}")
+    return filepath
+
+
+def _thread_id(service, message_id):
+    """Return a message's thread ID, from the local store if possible."""
+    conn = mailstore.connect()
+    try:
+        thread_id = mailstore.get_thread_id(conn, message_id)
+    finally:
+        conn.close()
+    if thread_id:
+        return thread_id
+
+    # Not stored: ask for the thread ID alone rather than the full message
+    message = service.users().messages().get(
+        userId='me',
+        id=message_id,
+        format='minimal',
+        fields='threadId'
+    ).execute()
+    return message['threadId']
+
+
+def _store_message(conn, message, email):
+    """Save a fetched message resource and its parsed email to the store."""
+    payload = message.get('payload', {})
+    # Metadata responses carry no MIME parts, so attachments are unknown
+    attachments = _attachment_parts(payload) if 'body' in email else None
+    mailstore.save_email(conn, email, message.get('internalDate'), attachments)
+
+
+def _attachment_parts(payload):
+    """List the attachments in a message payload, at any depth."""
+    attachments = []
+    for part in payload.get('parts', []):
+        filename = part.get('filename', '')
+        attachment_id = part.get('body', {}).get('attachmentId')
+        if filename and attachment_id:
+            attachments.append({
+                'filename': filename,
+                'attachment_id': attachment_id,
+                'mime_type': part.get('mimeType', ''),
+                'size': part.get('body', {}).get('size', 0),
+            })
+        attachments.extend(_attachment_parts(part))
+    return attachments
+
+
+def _batch_get(service, message_ids, batch_size=BATCH_SIZE, resource='messages', **params):
+    """
+    Fetch messages (or threads) by ID using batch requests.
+
+    Args:
+        service: Gmail API service.
+        message_ids: List of message IDs.
+        batch_size: Calls per batch request; 1 or less fetches serially.
+        resource: 'messages' or 'threads'.
+        **params: Extra get parameters (format, fields, ...).
+
+    Returns:
+        List of (message_id, message, error) tuples in the order of
+        message_ids. Exactly one of message and error is None.
+    """
+    messages = getattr(service.users(), resource)()
+
+    if batch_size <= 1:
+        results = []
+        for msg_id in message_ids:
+            try:
+                results.append((msg_id, messages.get(userId='me', id=msg_id, **params).execute(), None))
+            except Exception as e:
+                results.append((msg_id, None, e))
+        return results
+
+    responses = {}
+
+    def collect(request_id, response, exception):
+        responses[request_id] = (response, exception)
+
+    for start in range(0, len(message_ids), batch_size):
+        batch = service.new_batch_http_request(callback=collect)
+        requests = []
+        for offset, msg_id in enumerate(message_ids[start:start + batch_size]):
+            request = messages.get(userId='me', id=msg_id, **params)
+            requests.append(request)
+            batch.add(request, request_id=str(start + offset))
+        # Calls inside a batch bypass HttpRequest.execute, so charge them here
+        quota.charge_batch(requests)
+        batch.execute()
+
+    missing = (None, RuntimeError('no response in batch'))
+    return [
+        (msg_id, *responses.get(str(index), missing))
+        for index, msg_id in enumerate(message_ids)
+    ]
+
+
+def _parse_message(message, include_body=True):
+    """Convert a Gmail message resource into an email dict."""
+    headers = {h['name']: h['value'] for h in message.get('payload', {}).get('headers', [])}
+
+    email = {
+        'id': message['id'],
+        'thread_id': message.get('threadId'),
+        'from': headers.get('From', ''),
+        'to': headers.get('To', ''),
+        'subject': headers.get('Subject', ''),
+        'date': headers.get('Date', ''),
+        'snippet': message.get('snippet', ''),
+    }
+    if include_body:
+        email['body'] = _extract_body(message.get('payload', {}), BODY_CHARS)
+    email['labels'] = message.get('labelIds', [])
+    return email
+
+
+def _parse_thread(thread, include_body=True):
+    """Convert a Gmail thread resource into one compact thread dict."""
+    messages = sorted(thread.get('messages', []), key=lambda m: int(m.get('internalDate', 0)))
+    participants = {}
+    labels = []
+    entries = []
+
+    for message in messages:
+        headers = {h['name']: h['value'] for h in message.get('payload', {}).get('headers', [])}
+        addresses = [headers.get(name, '') for name in ('From', 'To', 'Cc')]
+        for name, address in getaddresses([a for a in addresses if a]):
+            if address:
+                participants.setdefault(address.lower(), name or address)
+        labels += [label for label in message.get('labelIds', []) if label not in labels]
+
+        entry = {'id': message['id'], 'from': headers.get('From', ''), 'date': headers.get('Date', '')}
+        if include_body:
+            entry['body'] = collapse_quoted(_extract_body(message.get('payload', {}), BODY_CHARS))
+        entries.append(entry)
+
+    latest = messages[-1] if messages else {}
+    subject = ''
+    if messages:
+        subject = next((h['value'] for h in messages[0].get('payload', {}).get('headers', [])
+                        if h['name'] == 'Subject'), '')
+    timestamp = int(latest.get('internalDate', 0)) / 1000
+
+    return {
+        'thread_id': thread['id'],
+        'subject': subject,
+        'participants': sorted(participants),
+        'message_count': len(messages),
+        'latest_from': entries[-1]['from'] if entries else '',
+        'latest_timestamp': datetime.fromtimestamp(timestamp).isoformat(timespec='seconds') if timestamp else '',
+        'snippet': latest.get('snippet', ''),
+        'labels': labels,
+        'messages': entries,
+    }
+
+
+def _extract_body(payload, limit=None):
+    """Extract the plain text body from an email payload (see tools.mime)."""
+    return extract_text(payload, limit)
 
 
 def _text_to_html(text):
@@ -241,7 +911,10 @@ def _text_to_html(text):
     return '\n'.join(html_paragraphs)
 
 
-def main():
+def main(argv=None):
+    if argv is None:
+        forward_to_daemon('gmail')
+
     parser = argparse.ArgumentParser(description='Gmail API for Founder OS')
     subparsers = parser.add_subparsers(dest='command', help='Commands')
 
@@ -249,7 +922,44 @@ def main():
     fetch_parser = subparsers.add_parser('fetch', help='Fetch emails from Gmail')
     fetch_parser.add_argument('-n', '--max', type=int, default=20, help='Max emails to fetch')
     fetch_parser.add_argument('-q', '--query', default='in:inbox', help='Gmail search query')
-    fetch_parser.add_argument('-o', '--output', help='Output filename')
+    fetch_parser.add_argument('-o', '--output', help="Output filename ('-' for stdout)")
+    fetch_parser.add_argument('--format', choices=FORMATS, default='json', help='Output format')
+    fetch_parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                              help='Messages per batch request (1 = serial)')
+    fetch_parser.add_argument('--mode', choices=sorted(FETCH_MODES), default='full',
+                              help='full: with bodies; metadata: headers and snippet only')
+    fetch_parser.add_argument('--no-cache', action='store_true',
+                              help='Download every message, ignoring the local store')
+
+    # Threads
+    threads_parser = subparsers.add_parser('threads', help='Fetch whole conversations')
+    threads_parser.add_argument('-n', '--max', type=int, default=10, help='Max threads to fetch')
+    threads_parser.add_argument('-q', '--query', default='in:inbox', help='Gmail search query')
+    threads_parser.add_argument('-o', '--output', help="Output filename ('-' for stdout)")
+    threads_parser.add_argument('--format', choices=FORMATS, default='json', help='Output format')
+    threads_parser.add_argument('--mode', choices=sorted(THREAD_MODES), default='full',
+                                help='full: with bodies; metadata: headers only')
+
+    # Get
+    get_parser = subparsers.add_parser('get', help='Fetch full messages by ID')
+    get_parser.add_argument('ids', nargs='+', help='Message IDs')
+    get_parser.add_argument('-o', '--output', help="Output filename ('-' for stdout)")
+    get_parser.add_argument('--format', choices=FORMATS, default='json', help='Output format')
+
+    # Sync
+    sync_parser = subparsers.add_parser('sync', help='Incrementally sync a label to the local store')
+    sync_parser.add_argument('-n', '--max', type=int, default=100, help='Max emails to keep and save')
+    sync_parser.add_argument('--label', default='INBOX', help='Label ID to sync')
+    sync_parser.add_argument('--full', action='store_true', help='Ignore saved history and resync')
+    sync_parser.add_argument('-o', '--output', help="Output filename ('-' for stdout)")
+    sync_parser.add_argument('--format', choices=FORMATS, default='json', help='Output format')
+
+    # Search local
+    local_parser = subparsers.add_parser('search-local', help='Search fetched emails offline')
+    local_parser.add_argument('query', help='Words to search for')
+    local_parser.add_argument('-n', '--max', type=int, default=20, help='Max results')
+    local_parser.add_argument('-o', '--output', help="Output filename ('-' for stdout)")
+    local_parser.add_argument('--format', choices=FORMATS, default='json', help='Output format')
 
     # Draft
     draft_parser = subparsers.add_parser('draft', help='Create a draft email')
@@ -261,31 +971,58 @@ def main():
 
     # Archive
     archive_parser = subparsers.add_parser('archive', help='Archive emails')
-    archive_parser.add_argument('ids', nargs='+', help='Message IDs to archive')
+    archive_parser.add_argument('ids', nargs='*', help='Message IDs to archive')
+    archive_parser.add_argument('-q', '--query', help='Archive every message matching this query')
 
     # Attachments
     attach_parser = subparsers.add_parser('attachments', help='Download attachments')
-    attach_parser.add_argument('id', help='Message ID')
+    attach_parser.add_argument('ids', nargs='+', help='Message IDs')
     attach_parser.add_argument('-o', '--output', help='Output directory')
+    attach_parser.add_argument('--max-size', type=float, default=MAX_ATTACHMENT_BYTES / 1024 / 1024,
+                               help='Skip attachments larger than this many MB')
+    attach_parser.add_argument('--workers', type=int, default=ATTACHMENT_WORKERS,
+                               help='Concurrent downloads')
 
     # Auth
     subparsers.add_parser('auth', help='Test authentication')
 
-    args = parser.parse_args()
-
-    if args.command == 'fetch':
-        fetch_emails(max_results=args.max, query=args.query, output_file=args.output)
-    elif args.command == 'draft':
-        create_draft(args.to, args.subject, args.body, args.reply_to, cc=args.cc)
-    elif args.command == 'archive':
-        archive_emails(args.ids)
-    elif args.command == 'attachments':
-        get_attachments(args.id, output_dir=args.output)
-    elif args.command == 'auth':
-        get_gmail()
-        print("Gmail authentication successful!")
-    else:
-        parser.print_help()
+    args = parser.parse_args(argv)
+    quota.reset_usage()
+
+    # Records on stdout: keep progress messages out of the stream
+    with progress_to_stderr(getattr(args, 'output', None) == '-'):
+        if args.command == 'fetch':
+            fetch_emails(max_results=args.max, query=args.query, output_file=args.output,
+                         batch_size=args.batch_size, collect=False, mode=args.mode,
+                         use_cache=not args.no_cache, fmt=args.format)
+        elif args.command == 'threads':
+            fetch_threads(max_results=args.max, query=args.query, output_file=args.output,
+                          mode=args.mode, fmt=args.format)
+        elif args.command == 'get':
+            get_messages(args.ids, output_file=args.output, fmt=args.format)
+        elif args.command == 'sync':
+            sync_mailbox(label=args.label, max_results=args.max, output_file=args.output,
+                         full=args.full, fmt=args.format)
+        elif args.command == 'search-local':
+            search_local(args.query, max_results=args.max, output_file=args.output, fmt=args.format)
+        elif args.command == 'draft':
+            create_draft(args.to, args.subject, args.body, args.reply_to, cc=args.cc)
+        elif args.command == 'archive':
+            if not args.ids and not args.query:
+                parser.error('archive needs message IDs or --query')
+            result = archive_emails(args.ids, query=args.query)
+            if result['failed']:
+                sys.exit(1)
+        elif args.command == 'attachments':
+            get_attachments(args.ids, output_dir=args.output,
+                            max_bytes=int(args.max_size * 1024 * 1024), workers=args.workers)
+        elif args.command == 'auth':
+            get_gmail()
+            print("Gmail authentication successful!")
+        else:
+            parser.print_help()
+
+    quota.report_usage()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Local Gmail message store for Founder OS.
+A small SQLite database under _temp/ that keeps every message the tools
+have fetched, plus the mailbox historyId needed for incremental sync and
+a full-text index for offline search.
+Gmail messages never change apart from their labels, so stored headers,
+bodies, and attachment lists can be served without another API call.
+"""
+
+import json
+import sqlite3
+
+from tools.config import TEMP_DIR
+
+STORE_PATH = TEMP_DIR / 'mailstore.db'
+
+# Seconds to wait for another tool process to finish writing
+BUSY_TIMEOUT = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id TEXT PRIMARY KEY,
+    thread_id TEXT,
+    sender TEXT,
+    recipients TEXT,
+    subject TEXT,
+    date TEXT,
+    snippet TEXT,
+    body TEXT,
+    labels TEXT,
+    internal_date INTEGER,
+    attachments TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_internal_date ON messages (internal_date);
+CREATE INDEX IF NOT EXISTS messages_thread_id ON messages (thread_id);
+"""
+
+# Full-text index over the searchable columns, kept in step by triggers.
+# Created separately because some SQLite builds lack FTS5.
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE messages_fts USING fts5(
+    subject, sender, recipients, snippet, body,
+    content='messages', content_rowid='rowid'
+);
+CREATE TRIGGER messages_fts_insert AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, subject, sender, recipients, snippet, body)
+    VALUES (new.rowid, new.subject, new.sender, new.recipients, new.snippet, new.body);
+END;
+CREATE TRIGGER messages_fts_delete AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, subject, sender, recipients, snippet, body)
+    VALUES ('delete', old.rowid, old.subject, old.sender, old.recipients, old.snippet, old.body);
+END;
+CREATE TRIGGER messages_fts_update AFTER UPDATE OF subject, sender, recipients, snippet, body
+ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, subject, sender, recipients, snippet, body)
+    VALUES ('delete', old.rowid, old.subject, old.sender, old.recipients, old.snippet, old.body);
+    INSERT INTO messages_fts (rowid, subject, sender, recipients, snippet, body)
+    VALUES (new.rowid, new.subject, new.sender, new.recipients, new.snippet, new.body);
+END;
+INSERT INTO messages_fts (messages_fts) VALUES ('rebuild');
+"""
+
+# Search ranking weights for subject, sender, recipients, snippet, body
+_FTS_WEIGHTS = (10.0, 5.0, 2.0, 1.0, 1.0)
+
+# Columns added after the first release, as (name, declaration)
+_ADDED_COLUMNS = [('attachments', 'TEXT')]
+
+_EMAIL_COLUMNS = 'id, thread_id, sender, recipients, subject, date, snippet, body, labels'
+
+
+def connect():
+    """
+    Open the message store, creating or upgrading it on first use.
+
+    The database runs in WAL mode, so several tool processes can read
+    while one writes; writers wait up to BUSY_TIMEOUT seconds for each
+    other instead of failing.
+
+    Returns:
+        sqlite3.Connection.
+    """
+    STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(STORE_PATH), timeout=BUSY_TIMEOUT)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with conn:
+        existing = {row[1] for row in conn.execute("PRAGMA table_info(messages)")}
+        if existing:
+            for name, declaration in _ADDED_COLUMNS:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE messages ADD COLUMN {name} {declaration}")
+        conn.executescript(_SCHEMA)
+    if not _has_table(conn, 'messages_fts'):
+        try:
+            conn.executescript(_FTS_SCHEMA)
+        except sqlite3.OperationalError:
+            # No FTS5 in this SQLite build; search() falls back to LIKE
+            pass
+    return conn
+
+
+def get_meta(conn, key):
+    """Return a stored metadata value, or None."""
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_meta(conn, key, value):
+    """Store a metadata value."""
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, None if value is None else str(value)),
+    )
+
+
+def save_email(conn, email, internal_date=0, attachments=None):
+    """
+    Insert or update one email.
+
+    A body or attachment list already in the store is kept when the
+    email has none, so a metadata refresh does not discard them.
+
+    Args:
+        conn: Store connection.
+        email: Email dict as produced by gmail._parse_message().
+        internal_date: Gmail internalDate (milliseconds since the epoch).
+        attachments: List of attachment dicts, or None if unknown.
+    """
+    conn.execute(
+        "INSERT INTO messages (id, thread_id, sender, recipients, subject, date, snippet, "
+        "body, labels, internal_date, attachments) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET thread_id = excluded.thread_id, "
+        "sender = excluded.sender, recipients = excluded.recipients, "
+        "subject = excluded.subject, date = excluded.date, snippet = excluded.snippet, "
+        "body = COALESCE(excluded.body, messages.body), labels = excluded.labels, "
+        "internal_date = excluded.internal_date, "
+        "attachments = COALESCE(excluded.attachments, messages.attachments)",
+        (
+            email['id'], email['thread_id'], email['from'], email['to'],
+            email['subject'], email['date'], email['snippet'], email.get('body'),
+            json.dumps(email.get('labels', [])), int(internal_date or 0),
+            None if attachments is None else json.dumps(attachments),
+        ),
+    )
+
+
+def get_emails(conn, message_ids, require_body=False):
+    """
+    Look up stored emails by ID.
+
+    Args:
+        conn: Store connection.
+        message_ids: List of Gmail message IDs.
+        require_body: Skip emails stored without a body.
+
+    Returns:
+        Dict of message ID to email dict, for the IDs that were found.
+    """
+    emails = {}
+    ids = list(message_ids)
+    # Stay well under SQLite's limit on query parameters
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(
+            f"SELECT {_EMAIL_COLUMNS} FROM messages WHERE id IN ({placeholders})", chunk)
+        for row in rows:
+            if require_body and row[7] is None:
+                continue
+            emails[row[0]] = _row_to_email(row)
+    return emails
+
+
+def get_thread_id(conn, message_id):
+    """Return a stored message's thread ID, or None if not stored."""
+    row = conn.execute("SELECT thread_id FROM messages WHERE id = ?", (message_id,)).fetchone()
+    return row[0] if row else None
+
+
+def get_attachments(conn, message_id):
+    """Return a stored message's attachment list, or None if not known."""
+    row = conn.execute("SELECT attachments FROM messages WHERE id = ?", (message_id,)).fetchone()
+    if row is None or row[0] is None:
+        return None
+    return json.loads(row[0])
+
+
+def delete_emails(conn, message_ids):
+    """Remove emails from the store."""
+    conn.executemany("DELETE FROM messages WHERE id = ?", [(i,) for i in message_ids])
+
+
+def update_labels(conn, message_id, add=(), remove=()):
+    """
+    Apply a label change to a stored email.
+
+    Args:
+        conn: Store connection.
+        message_id: Gmail message ID.
+        add: Label IDs to add.
+        remove: Label IDs to remove.
+
+    Returns:
+        True if the email is in the store, False otherwise.
+    """
+    row = conn.execute("SELECT labels FROM messages WHERE id = ?", (message_id,)).fetchone()
+    if row is None:
+        return False
+    labels = [label for label in json.loads(row[0]) if label not in remove]
+    labels += [label for label in add if label not in labels]
+    conn.execute("UPDATE messages SET labels = ? WHERE id = ?", (json.dumps(labels), message_id))
+    return True
+
+
+def list_emails(conn, label=None, limit=None):
+    """
+    Return stored emails, newest first.
+
+    Args:
+        conn: Store connection.
+        label: Only include emails with this label ID (optional).
+        limit: Maximum number of emails (optional).
+
+    Returns:
+        List of email dicts in the same shape as gmail._parse_message().
+    """
+    rows = conn.execute(f"SELECT {_EMAIL_COLUMNS} FROM messages ORDER BY internal_date DESC, id")
+    emails = []
+    for row in rows:
+        email = _row_to_email(row)
+        if label and label not in email['labels']:
+            continue
+        emails.append(email)
+        if limit and len(emails) >= limit:
+            break
+    return emails
+
+
+def search(conn, query, limit=20):
+    """
+    Search stored emails offline.
+
+    Every word in the query must appear in the subject, sender,
+    recipients, snippet, or body. Results are ranked with BM25, weighting
+    subject and sender matches above body matches.
+
+    Args:
+        conn: Store connection.
+        query: Free-text search, such as 'sarah contract'.
+        limit: Maximum number of results.
+
+    Returns:
+        List of email dicts, best match first, each with a 'match'
+        excerpt showing where the words were found.
+    """
+    terms = query.split()
+    if not terms:
+        return []
+
+    if not _has_table(conn, 'messages_fts'):
+        return _search_like(conn, terms, limit)
+
+    # Quote each word so punctuation (as in email addresses) is not FTS syntax
+    match = ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+    columns = ', '.join(f"m.{c.strip()}" for c in _EMAIL_COLUMNS.split(','))
+    rows = conn.execute(
+        f"SELECT {columns}, snippet(messages_fts, -1, '[', ']', '...', 12) "
+        f"FROM messages_fts JOIN messages m ON m.rowid = messages_fts.rowid "
+        f"WHERE messages_fts MATCH ? ORDER BY bm25(messages_fts, {', '.join(map(str, _FTS_WEIGHTS))}) "
+        f"LIMIT ?",
+        (match, limit),
+    )
+    results = []
+    for row in rows:
+        email = _row_to_email(row)
+        email['match'] = row[-1]
+        results.append(email)
+    return results
+
+
+def _search_like(conn, terms, limit):
+    """Unranked search for SQLite builds without FTS5, newest first."""
+    clauses = []
+    params = []
+    for term in terms:
+        clauses.append("(subject LIKE ? OR sender LIKE ? OR recipients LIKE ? "
+                       "OR snippet LIKE ? OR body LIKE ?)")
+        params.extend([f"%{term}%"] * 5)
+    rows = conn.execute(
+        f"SELECT {_EMAIL_COLUMNS} FROM messages WHERE {' AND '.join(clauses)} "
+        f"ORDER BY internal_date DESC LIMIT ?",
+        params + [limit],
+    )
+    return [dict(_row_to_email(row), match=row[6]) for row in rows]
+
+
+def _has_table(conn, name):
+    """True if the database has a table (or virtual table) called name."""
+    row = conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    return row is not None
+
+
+def _row_to_email(row):
+    """Convert a row of _EMAIL_COLUMNS into an email dict."""
+    email = {
+        'id': row[0],
+        'thread_id': row[1],
+        'from': row[2],
+        'to': row[3],
+        'subject': row[4],
+        'date': row[5],
+        'snippet': row[6],
+    }
+    if row[7] is not None:
+        email['body'] = row[7]
+    email['labels'] = json.loads(row[8])
+    return email
+
+
+def clear(conn):
+    """Forget every stored email and the sync state."""
+    conn.execute("DELETE FROM messages")
+    conn.execute("DELETE FROM meta")
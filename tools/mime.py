@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+MIME body extraction for Founder OS.
+Finds the best text part of a Gmail message payload at any depth and
+decodes only as much of it as the caller needs, converting HTML-only
+mail to plain text on the way.
+"""
+
+import re
+import base64
+import codecs
+from html.parser import HTMLParser
+
+# Base64 characters decoded per step (a multiple of 4)
+DECODE_CHUNK = 16 * 1024
+
+_CHARSET = re.compile(r'charset\s*=\s*"?([^";\s]+)', re.IGNORECASE)
+_BLANK_LINES = re.compile(r'\n\s*\n\s*\n+')
+_SPACES = re.compile(r'[ \t\r\f\v]+')
+
+# Lines that introduce quoted history in a reply
+_QUOTE_HEADER = re.compile(
+    r'^(On [^\n]{1,200}(?:\n[^\n]{0,200})? wrote:|-{2,} ?Original Message ?-{2,}|-{2,} ?Forwarded message ?-{2,})\s*$',
+    re.MULTILINE,
+)
+
+
+def extract_text(payload, limit=None):
+    """
+    Return the text of a message payload.
+
+    Prefers the first text/plain part found depth-first, so plain text
+    inside multipart/alternative nested in multipart/mixed is found, and
+    falls back to the first text/html part converted to text. Attachment
+    parts are ignored.
+
+    Args:
+        payload: Gmail message payload dict.
+        limit: Maximum characters to return (None for all). Only as much
+            of the body as this needs is decoded.
+
+    Returns:
+        Body text, or '' if the message has no text part.
+    """
+    plain, html = _find_text_parts(payload)
+    if plain is not None:
+        return _decode_text(plain, limit)
+    if html is not None:
+        return _decode_html(html, limit)
+    return ''
+
+
+def html_to_text(markup, limit=None):
+    """Convert an HTML string to plain text."""
+    converter = _HtmlText(limit)
+    converter.feed(markup)
+    converter.close()
+    return converter.text()
+
+
+def collapse_quoted(text):
+    """
+    Remove quoted history from a reply, keeping only the new text.
+
+    Cuts at the first 'On ... wrote:' or 'Original Message' line and
+    drops any remaining lines quoted with '>'.
+    """
+    match = _QUOTE_HEADER.search(text)
+    if match:
+        text = text[:match.start()]
+    lines = [line for line in text.splitlines() if not line.lstrip().startswith('>')]
+    return '\n'.join(lines).strip()
+
+
+def _find_text_parts(payload):
+    """Return the first text/plain and text/html parts with inline data."""
+    plain = html = None
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        children = part.get('parts')
+        if children:
+            # Reversed so parts are visited in document order
+            stack.extend(reversed(children))
+            continue
+        if part.get('filename') or not part.get('body', {}).get('data'):
+            continue
+        mime_type = part.get('mimeType', 'text/plain').lower()
+        if mime_type == 'text/plain' and plain is None:
+            plain = part
+            break
+        if mime_type == 'text/html' and html is None:
+            html = part
+    return plain, html
+
+
+def _charset(part):
+    """Return the part's declared charset, or utf-8 if unknown."""
+    for header in part.get('headers', []):
+        if header.get('name', '').lower() == 'content-type':
+            match = _CHARSET.search(header.get('value', ''))
+            if match:
+                try:
+                    return codecs.lookup(match.group(1)).name
+                except LookupError:
+                    break
+    return 'utf-8'
+
+
+def _iter_decoded(part):
+    """Yield the part's body as text, one decoded chunk at a time."""
+    data = part['body']['data']
+    decoder = codecs.getincrementaldecoder(_charset(part))(errors='replace')
+    for start in range(0, len(data), DECODE_CHUNK):
+        chunk = data[start:start + DECODE_CHUNK]
+        chunk += '=' * (-len(chunk) % 4)
+        final = start + DECODE_CHUNK >= len(data)
+        yield decoder.decode(base64.urlsafe_b64decode(chunk), final=final)
+
+
+def _decode_text(part, limit):
+    """Decode a text/plain part, stopping once limit characters are read."""
+    pieces = []
+    size = 0
+    for text in _iter_decoded(part):
+        pieces.append(text)
+        size += len(text)
+        if limit is not None and size >= limit:
+            break
+    text = ''.join(pieces)
+    return text if limit is None else text[:limit]
+
+
+def _decode_html(part, limit):
+    """Decode and convert a text/html part, stopping once limit characters are produced."""
+    converter = _HtmlText(limit)
+    for markup in _iter_decoded(part):
+        converter.feed(markup)
+        if converter.full():
+            break
+    converter.close()
+    return converter.text()
+
+
+class _HtmlText(HTMLParser):
+    """Collect the visible text of an HTML document, with line breaks for blocks."""
+
+    _SKIP = {'script', 'style', 'head', 'title'}
+    _BLOCK = {'p', 'div', 'br', 'li', 'tr', 'table', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+              'blockquote', 'pre', 'ul', 'ol', 'hr'}
+
+    def __init__(self, limit=None):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self._pieces = []
+        self._size = 0
+        self._skipping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIP:
+            self._skipping += 1
+        elif tag in self._BLOCK:
+            self._pieces.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIP:
+            self._skipping = max(self._skipping - 1, 0)
+        elif tag in self._BLOCK:
+            self._pieces.append('\n')
+
+    def handle_data(self, data):
+        if not self._skipping and not self.full():
+            self._pieces.append(data)
+            # Count text as it will read once whitespace is collapsed
+            self._size += len(' '.join(data.split()))
+
+    def full(self):
+        """True once at least limit characters of text have been collected."""
+        return self.limit is not None and self._size >= self.limit
+
+    def text(self):
+        """Return the collected text with whitespace tidied."""
+        text = _SPACES.sub(' ', ''.join(self._pieces))
+        text = '\n'.join(line.strip() for line in text.split('\n'))
+        text = _BLANK_LINES.sub('\n\n', text).strip()
+        return text if self.limit is None else text[:self.limit]
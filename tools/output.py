@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Streaming output writers for Founder OS tools.
+Records are written as they arrive instead of being collected into a list
+and dumped at the end, so large results use constant memory.
+
+Three formats are supported:
+    json     One indented JSON array (the default, easy to read).
+    compact  One JSON array without whitespace.
+    ndjson   One compact JSON record per line, flushed as it is written,
+             so a consumer can start on the first record straight away.
+"""
+
+import sys
+import json
+from contextlib import contextmanager, redirect_stdout
+
+FORMATS = ('json', 'compact', 'ndjson')
+
+# Pass as the output filename to write records to stdout
+STDOUT = '-'
+
+# Where records go while progress_to_stderr() is active
+_record_stream = None
+
+
+class JsonArrayWriter:
+    """
+    Write records to a file as one JSON array, one record at a time.
+
+    The file is only created when the first record is written, and the
+    output matches json.dump(records, f, indent=2), or the compact
+    equivalent when compact is True.
+    """
+
+    def __init__(self, path, compact=False):
+        self.path = path
+        self.compact = compact
+        self.count = 0
+        self._file = None
+
+    @property
+    def name(self):
+        return '<stdout>' if self.path == STDOUT else str(self.path)
+
+    def write(self, record):
+        """Append one record to the array."""
+        if self._file is None:
+            self._file = _open(self.path)
+            self._file.write('[' if self.compact else '[\n')
+        else:
+            self._file.write(',' if self.compact else ',\n')
+        if self.compact:
+            self._file.write(json.dumps(record, separators=(',', ':')))
+        else:
+            text = json.dumps(record, indent=2)
+            self._file.write('  ' + text.replace('\n', '\n  '))
+        self.count += 1
+
+    def close(self):
+        """Close the array. Nothing is written to a file if there were no records."""
+        if self._file is None and self.path == STDOUT:
+            self._file = _open(self.path)
+            self._file.write('[')
+        if self._file is not None:
+            self._file.write(']' if self.compact or not self.count else '\n]')
+            if self.path == STDOUT:
+                self._file.write('\n')
+            _close(self._file, self.path)
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class NdjsonWriter:
+    """Write records as newline-delimited JSON, flushing after every line."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = None
+
+    @property
+    def name(self):
+        return '<stdout>' if self.path == STDOUT else str(self.path)
+
+    def write(self, record):
+        """Write one record as a line."""
+        if self._file is None:
+            self._file = _open(self.path)
+        self._file.write(json.dumps(record, separators=(',', ':')) + '\n')
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        """Close the file, if one was opened."""
+        if self._file is not None:
+            _close(self._file, self.path)
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_writer(directory, output_file, fmt='json'):
+    """
+    Create a writer for a tool's output.
+
+    Args:
+        directory: Directory for relative filenames (usually OUTPUT_DIR).
+        output_file: Filename, or STDOUT ('-') to write to stdout.
+        fmt: One of FORMATS.
+
+    Returns:
+        JsonArrayWriter or NdjsonWriter.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format: {fmt}")
+    path = STDOUT if output_file == STDOUT else directory / output_file
+    if fmt == 'ndjson':
+        return NdjsonWriter(path)
+    return JsonArrayWriter(path, compact=(fmt == 'compact'))
+
+
+def default_filename(stem, fmt='json'):
+    """Return stem plus the extension for the format."""
+    return f"{stem}.ndjson" if fmt == 'ndjson' else f"{stem}.json"
+
+
+@contextmanager
+def progress_to_stderr(enabled=True):
+    """
+    Send progress messages to stderr while records are written to stdout.
+
+    Writers opened for STDOUT inside this block still write to the
+    original stdout, so the record stream stays clean.
+    """
+    global _record_stream
+
+    if not enabled:
+        yield
+        return
+
+    previous = _record_stream
+    _record_stream = sys.stdout
+    try:
+        with redirect_stdout(sys.stderr):
+            yield
+    finally:
+        _record_stream = previous
+
+
+def _open(path):
+    """Open a file for writing, or return the stream for stdout."""
+    if path == STDOUT:
+        return _record_stream or sys.stdout
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return open(path, 'w')
+
+
+def _close(stream, path):
+    """Close a file; stdout is only flushed."""
+    if path == STDOUT:
+        stream.flush()
+    else:
+        stream.close()
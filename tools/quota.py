@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Quota-aware request scheduling for Founder OS.
+Every Google API request is charged against a per-API token bucket sized
+from the published per-user quota, so large fetches and archives slow
+down just below the limit instead of failing with rateLimitExceeded.
+"""
+
+import sys
+import time
+import threading
+
+from tools.config import get_quota_limits
+
+# Gmail quota units per method (developers.google.com/gmail/api/reference/quota).
+# Methods not listed cost DEFAULT_COST; Calendar and Drive charge one per request.
+COSTS = {
+    'gmail.users.getProfile': 1,
+    'gmail.users.history.list': 2,
+    'gmail.users.labels.list': 1,
+    'gmail.users.messages.list': 5,
+    'gmail.users.messages.get': 5,
+    'gmail.users.messages.modify': 5,
+    'gmail.users.messages.trash': 5,
+    'gmail.users.messages.delete': 10,
+    'gmail.users.messages.batchModify': 50,
+    'gmail.users.messages.batchDelete': 50,
+    'gmail.users.messages.send': 100,
+    'gmail.users.messages.attachments.get': 5,
+    'gmail.users.threads.list': 10,
+    'gmail.users.threads.get': 10,
+    'gmail.users.threads.modify': 10,
+    'gmail.users.drafts.list': 5,
+    'gmail.users.drafts.get': 5,
+    'gmail.users.drafts.create': 10,
+    'gmail.users.drafts.update': 15,
+    'gmail.users.drafts.send': 100,
+}
+DEFAULT_COST = 1
+
+_buckets = {}
+_usage = {}
+_lock = threading.Lock()
+_request_class = None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled at a steady rate.
+
+    A request costing more than the bucket holds waits for a full bucket
+    and then runs, leaving the bucket in debt, so one large batch is
+    never blocked forever.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, units):
+        """
+        Take units from the bucket, waiting until they are available.
+
+        Returns:
+            Seconds spent waiting.
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                needed = min(units, self.capacity)
+                if self._tokens >= needed:
+                    self._tokens -= units
+                    return waited
+                delay = (needed - self._tokens) / self.rate
+            self._sleep(delay)
+            waited += delay
+
+
+def acquire(method_id, count=1):
+    """
+    Charge a request (or several of the same kind) to its API's bucket.
+
+    Args:
+        method_id: Discovery method ID, such as 'gmail.users.messages.get'.
+        count: Number of requests.
+
+    Returns:
+        Seconds spent waiting for quota.
+    """
+    if not isinstance(method_id, str):
+        return 0.0
+
+    api = method_id.split('.', 1)[0]
+    units = COSTS.get(method_id, DEFAULT_COST) * count
+    bucket = _bucket(api)
+    waited = bucket.acquire(units) if bucket else 0.0
+
+    with _lock:
+        entry = _usage.setdefault(method_id, {'calls': 0, 'units': 0, 'waited': 0.0})
+        entry['calls'] += count
+        entry['units'] += units
+        entry['waited'] += waited
+    return waited
+
+
+def charge_batch(requests):
+    """
+    Charge every request in a batch before it is sent.
+
+    Google bills each call inside a batch separately, so a batch of 50
+    messages.get costs 250 Gmail units.
+
+    Args:
+        requests: HttpRequest objects about to be batched.
+    """
+    counts = {}
+    for request in requests:
+        method_id = getattr(request, 'methodId', None)
+        if isinstance(method_id, str):
+            counts[method_id] = counts.get(method_id, 0) + 1
+    for method_id, count in counts.items():
+        acquire(method_id, count)
+
+
+def usage():
+    """
+    Report quota spent since the last reset.
+
+    Returns:
+        Dict of method ID to calls, units, and seconds waited.
+    """
+    with _lock:
+        return {method: dict(entry) for method, entry in _usage.items()}
+
+
+def reset_usage():
+    """Forget recorded usage (buckets keep their state)."""
+    with _lock:
+        _usage.clear()
+
+
+def reset():
+    """Forget usage and buckets; limits are re-read from config on next use."""
+    with _lock:
+        _usage.clear()
+        _buckets.clear()
+
+
+def report_usage(stream=None):
+    """Print units spent per API to stderr, if any were spent."""
+    totals = {}
+    for method, entry in usage().items():
+        api = totals.setdefault(method.split('.', 1)[0], {'calls': 0, 'units': 0, 'waited': 0.0})
+        for key in api:
+            api[key] += entry[key]
+    if not totals:
+        return
+    parts = [
+        f"{api} {t['units']} units / {t['calls']} calls" + (f", waited {t['waited']:.1f}s" if t['waited'] else '')
+        for api, t in sorted(totals.items())
+    ]
+    print(f"[quota] {'; '.join(parts)}", file=stream or sys.stderr)
+
+
+def request_builder():
+    """
+    Return an HttpRequest subclass that charges quota before executing.
+
+    Pass as requestBuilder to googleapiclient's build(). The class is
+    created on first use so the client library is imported lazily.
+    """
+    global _request_class
+
+    if _request_class is None:
+        from googleapiclient.http import HttpRequest
+
+        class QuotaHttpRequest(HttpRequest):
+            """HttpRequest that waits for quota before it is sent."""
+
+            def execute(self, http=None, num_retries=0):
+                acquire(self.methodId)
+                return super().execute(http=http, num_retries=num_retries)
+
+        _request_class = QuotaHttpRequest
+    return _request_class
+
+
+def _bucket(api):
+    """Return the bucket for an API, creating it from config on first use."""
+    with _lock:
+        if api not in _buckets:
+            limits = get_quota_limits()
+            per_minute = limits['per_minute'].get(api)
+            if per_minute:
+                # Aim just under the published limit, with a one-second burst
+                rate = per_minute / 60 * limits['headroom']
+                _buckets[api] = TokenBucket(rate, capacity=rate)
+            else:
+                _buckets[api] = None
+        return _buckets[api]
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP transport for Founder OS.
+One pooled, thread-safe, authorised transport is shared by the Gmail,
+Calendar, and Drive services so keep-alive connections are reused across
+APIs instead of each service opening its own.
+"""
+
+import queue
+import threading
+from urllib.parse import urlsplit
+
+from tools.config import get_http_pool_size
+
+# Shared transport for the current credentials object
+_transport = None
+_transport_lock = threading.Lock()
+
+
+class PooledHttp:
+    """
+    A pool of authorised httplib2 clients that looks like a single one.
+
+    httplib2.Http is not thread-safe, so each request borrows a client
+    from the pool and returns it afterwards. Each client keeps its own
+    keep-alive connection per host, which later requests reuse.
+    """
+
+    def __init__(self, credentials, size):
+        self.credentials = credentials
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._clients = []
+        self._stats = {'requests': 0, 'connections_opened': 0, 'connections_reused': 0, 'hosts': {}}
+
+    def request(self, uri, method='GET', body=None, headers=None, **kwargs):
+        """Send a request on a pooled client; same signature as httplib2.Http."""
+        headers = _with_gzip(headers)
+        key = _connection_key(uri)
+
+        self._slots.acquire()
+        try:
+            client = self._checkout()
+            try:
+                existing = client.connections.get(key)
+                reused = existing is not None and getattr(existing, 'sock', None) is not None
+                response = client.request(uri, method, body=body, headers=headers, **kwargs)
+                self._record(key, reused)
+                return response
+            finally:
+                self._idle.put(client)
+        finally:
+            self._slots.release()
+
+    def stats(self):
+        """
+        Report pool usage.
+
+        Returns:
+            Dict with request and connection counts, overall and per host.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['hosts'] = {host: dict(counts) for host, counts in self._stats['hosts'].items()}
+            stats['pool_size'] = self.size
+            stats['clients'] = len(self._clients)
+        return stats
+
+    def close(self):
+        """Close every pooled connection."""
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            client.close()
+
+    def _checkout(self):
+        """Take an idle client, creating one if the pool is not yet full."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            client = _new_client(self.credentials)
+            with self._lock:
+                self._clients.append(client)
+            return client
+
+    def _record(self, key, reused):
+        """Update request and connection counters for one request."""
+        with self._lock:
+            host = self._stats['hosts'].setdefault(key.split(':', 1)[1], {'requests': 0, 'connections': 0})
+            host['requests'] += 1
+            self._stats['requests'] += 1
+            if reused:
+                self._stats['connections_reused'] += 1
+            else:
+                self._stats['connections_opened'] += 1
+                host['connections'] += 1
+
+
+def get_http(credentials):
+    """
+    Return the process-wide pooled transport for these credentials.
+
+    A new pool is created when the credentials object changes, for
+    example after re-authentication.
+
+    Args:
+        credentials: google.oauth2.credentials.Credentials object.
+
+    Returns:
+        PooledHttp instance.
+    """
+    global _transport
+
+    with _transport_lock:
+        if _transport is None or _transport.credentials is not credentials:
+            if _transport is not None:
+                _transport.close()
+            _transport = PooledHttp(credentials, get_http_pool_size())
+        return _transport
+
+
+def transport_stats():
+    """Return pool statistics for the shared transport, or None if unused."""
+    with _transport_lock:
+        return _transport.stats() if _transport else None
+
+
+def reset_transport():
+    """Close and forget the shared transport."""
+    global _transport
+
+    with _transport_lock:
+        if _transport is not None:
+            _transport.close()
+        _transport = None
+
+
+def _new_client(credentials):
+    """Create one authorised httplib2 client (imports are deferred to here)."""
+    import google_auth_httplib2
+    from googleapiclient.http import build_http
+
+    return google_auth_httplib2.AuthorizedHttp(credentials, http=build_http())
+
+
+def _with_gzip(headers):
+    """Copy request headers, asking Google to gzip the response."""
+    headers = dict(headers or {})
+    names = {name.lower(): name for name in headers}
+    if 'accept-encoding' not in names:
+        headers['accept-encoding'] = 'gzip'
+    # Google only compresses responses when the user agent mentions gzip
+    agent = names.get('user-agent')
+    if agent is None:
+        headers['user-agent'] = 'founder-os (gzip)'
+    elif 'gzip' not in headers[agent]:
+        headers[agent] = f"{headers[agent]} (gzip)"
+    return headers
+
+
+def _connection_key(uri):
+    """httplib2 keeps one connection per scheme and host."""
+    parts = urlsplit(uri)
+    return f"{parts.scheme}:{parts.netloc.lower()}"